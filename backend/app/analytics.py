@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import Date, cast, func, literal_column, type_coerce
+from sqlalchemy.orm import Session
+
+from . import models
+
+def bucket_expression(dialect: str, bucket: str, column):
+    """Truncate ``column`` to the start of its day, ISO week or month.
+
+    The bucket is rendered inline rather than bound, so the same expression
+    can appear in both SELECT and GROUP BY on Postgres.
+    """
+    if dialect == "sqlite":
+        modifiers = {
+            "day": (),
+            "week": ("-6 days", "weekday 1"),  # Monday on or before the date
+            "month": ("start of month",),
+        }[bucket]
+        return type_coerce(
+            func.date(column, *(literal_column(f"'{m}'") for m in modifiers)), Date
+        )
+    return cast(func.date_trunc(literal_column(f"'{bucket}'"), column), Date)
+
+def manpower_summary(
+    db: Session,
+    bucket: str = "day",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    period = bucket_expression(db.get_bind().dialect.name, bucket, models.Manpower.date).label("period")
+    head_count = func.coalesce(func.sum(models.Manpower.number_of_manpower), 0)
+    total_cost = func.coalesce(
+        func.sum(models.Manpower.perday_cost * models.Manpower.number_of_manpower), 0
+    )
+
+    query = db.query(
+        period,
+        models.Manpower.manpower_type,
+        models.Manpower.engaged_to,
+        func.count(models.Manpower.id).label("records"),
+        head_count.label("head_count"),
+        total_cost.label("total_cost"),
+    )
+    if start_date is not None:
+        query = query.filter(models.Manpower.date >= start_date)
+    if end_date is not None:
+        query = query.filter(models.Manpower.date <= end_date)
+
+    return (
+        query.group_by(period, models.Manpower.manpower_type, models.Manpower.engaged_to)
+        .order_by(period, models.Manpower.manpower_type, models.Manpower.engaged_to)
+        .all()
+    )
@@ -0,0 +1,137 @@
+"""Async form of the API, used when ASYNC_DB is enabled.
+
+Sync endpoints taking ``db: Session`` are wrapped so their body runs through
+``AsyncSession.run_sync``: the same code executes, but every database call
+goes through the asyncio driver instead of holding a threadpool slot.
+
+``run_sync`` runs the whole body on the event loop thread, including any
+CPU work between queries (building trees, encoding responses), and nothing
+else on the loop runs meanwhile. Async mode therefore suits I/O-bound
+endpoints. Heavy parsing, such as file imports, gets a hand-written body
+in ``REPLACEMENTS`` that does that work in the threadpool.
+"""
+import functools
+import inspect
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models, schemas, auth, importer
+from .database import get_async_db
+
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    for column, detail in (
+        (models.User.username, "Username already registered"),
+        (models.User.email, "Email already registered"),
+    ):
+        value = getattr(user, column.key)
+        existing = await db.execute(select(models.User.id).where(column == value))
+        if existing.first():
+            raise HTTPException(status_code=400, detail=detail)
+
+    db_user = models.User(
+        username=user.username,
+        email=user.email,
+        hashed_password=await auth.get_password_hash_async(user.password),
+        is_admin=user.is_admin
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    auth.invalidate_user(db_user.username)
+    return db_user
+
+async def _import_upload(db: AsyncSession, kind: str, file: UploadFile, file_format: Optional[str],
+                         sheet: Optional[str], owner_id: int):
+    file_format = file_format or importer.detect_format(file.filename)
+    if file_format not in importer.FORMATS:
+        raise HTTPException(status_code=400, detail="File must be .csv or .xlsx")
+    target = importer.Import(db.sync_session, kind, owner_id)
+    try:
+        # Parsing (openpyxl above all) is CPU work: it runs in the threadpool
+        # a chunk at a time, and only the inserts use the event loop
+        rows = await run_in_threadpool(importer.read_rows, file.file, file_format, kind, sheet)
+        while True:
+            chunk = await run_in_threadpool(importer.take, rows)
+            if not chunk:
+                break
+            await db.run_sync(lambda session: target.add_rows(chunk))
+        return await db.run_sync(lambda session: target.finish())
+    except (ValueError, RuntimeError) as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def import_tasks(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    sheet: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    return await _import_upload(db, "tasks", file, format, sheet, current_user.id)
+
+async def import_manpower(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    sheet: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    return await _import_upload(db, "manpower", file, format, sheet, current_user.id)
+
+# Endpoints that need a hand-written async body instead of run_sync
+REPLACEMENTS = {
+    ("/users/", "POST"): create_user,
+    ("/tasks/import", "POST"): import_tasks,
+    ("/manpower/import", "POST"): import_manpower,
+}
+
+def _swap_db_parameter(signature: inspect.Signature) -> inspect.Signature:
+    return signature.replace(parameters=[
+        param.replace(annotation=AsyncSession, default=Depends(get_async_db))
+        if param.name == "db" else param
+        for param in signature.parameters.values()
+    ])
+
+def asyncify_endpoint(endpoint):
+    signature = inspect.signature(endpoint)
+    if "db" not in signature.parameters:
+        return endpoint
+
+    if inspect.iscoroutinefunction(endpoint):
+        # Already async: it receives the AsyncSession directly
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            return await endpoint(**kwargs)
+    else:
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs):
+            db = kwargs.pop("db")
+            return await db.run_sync(lambda session: endpoint(db=session, **kwargs))
+
+    wrapper.__signature__ = _swap_db_parameter(signature)
+    return wrapper
+
+def asyncify_router(router: APIRouter) -> APIRouter:
+    """Copy ``router`` with every database-backed endpoint in async form."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        for method in route.methods:
+            endpoint = REPLACEMENTS.get((route.path, method)) or asyncify_endpoint(route.endpoint)
+            async_router.add_api_route(
+                route.path,
+                endpoint,
+                methods=[method],
+                response_model=route.response_model,
+                status_code=route.status_code,
+                response_class=route.response_class,
+                name=route.name,
+            )
+    return async_router
@@ -1,12 +1,19 @@
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from . import models, schemas
-from .database import get_db
+from .database import ASYNC_DB, SessionLocal, get_async_db, get_db
+from .cache import TTLCache
 import os
 from dotenv import load_dotenv
 
@@ -17,9 +24,24 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Resolved users keyed by token subject, so most requests skip the users query
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+user_cache = TTLCache(maxsize=USER_CACHE_SIZE, ttl=USER_CACHE_TTL_SECONDS)
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt runs in its own bounded pool so login bursts can't starve the event
+# loop or the request threadpool
+PASSWORD_HASH_CONCURRENCY = int(os.getenv("PASSWORD_HASH_CONCURRENCY", "4"))
+_hash_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_CONCURRENCY, thread_name_prefix="password-hash"
+)
+_hash_lock = threading.Lock()
+_hash_queue_depth = 0
+_hash_queue_peak = 0
+
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -29,14 +51,56 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def authenticate_user(db: Session, username: str, password: str):
-    user = db.query(models.User).filter(models.User.username == username).first()
+def _hash_job_done(_: Future):
+    global _hash_queue_depth
+    with _hash_lock:
+        _hash_queue_depth -= 1
+
+def submit_hashing(fn, *args) -> Future:
+    """Run a password hashing call on the bounded bcrypt pool."""
+    global _hash_queue_depth, _hash_queue_peak
+    with _hash_lock:
+        _hash_queue_depth += 1
+        _hash_queue_peak = max(_hash_queue_peak, _hash_queue_depth)
+    future = _hash_executor.submit(fn, *args)
+    future.add_done_callback(_hash_job_done)
+    return future
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(submit_hashing(verify_password, plain_password, hashed_password))
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(submit_hashing(get_password_hash, password))
+
+def hashing_stats() -> dict:
+    """Queued plus running bcrypt jobs, and the highest depth seen."""
+    with _hash_lock:
+        return {
+            "password_hash_queue_depth": _hash_queue_depth,
+            "password_hash_queue_peak": _hash_queue_peak,
+            "password_hash_concurrency": PASSWORD_HASH_CONCURRENCY,
+        }
+
+def get_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
+async def authenticate_user_async(db, username: str, password: str):
+    # Neither the users query nor bcrypt may block the event loop
+    if isinstance(db, AsyncSession):
+        result = await db.execute(select(models.User).where(models.User.username == username))
+        user = result.scalars().first()
+    else:
+        user = await run_in_threadpool(get_user, db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
+def invalidate_user(username: str):
+    """Drop a cached user; call after any write to that user's row."""
+    user_cache.pop(username)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -47,26 +111,78 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def credentials_error():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def token_subject(token: Optional[str]) -> str:
+    """Return the username a valid token was issued to."""
+    credentials_exception = credentials_error()
+    if not token:
+        raise credentials_exception
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = schemas.TokenData(username=username)
     except JWTError:
         raise credentials_exception
+    return username
+
+def load_user(username: str):
+    """Resolve a user outside any request session, through the cache."""
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    db = SessionLocal()
+    try:
+        user = get_user(db, username)
+        if user is None:
+            raise credentials_error()
+        db.expunge(user)
+    finally:
+        db.close()
+    user_cache.set(username, user)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    credentials_exception = credentials_error()
+    token_data = schemas.TokenData(username=token_subject(token))
+    user = user_cache.get(token_data.username)
+    if user is not None:
+        return user
     user = db.query(models.User).filter(models.User.username == token_data.username).first()
     if user is None:
         raise credentials_exception
+    # Detach so the cached instance is not expired by this session's commits
+    db.expunge(user)
+    user_cache.set(token_data.username, user)
     return user
 
-async def get_current_active_user(current_user: models.User = Depends(get_current_user)):
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    username = token_subject(token)
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    user = result.scalars().first()
+    if user is None:
+        raise credentials_error()
+    db.expunge(user)
+    user_cache.set(username, user)
+    return user
+
+def get_user_dep():
+    """The current-user dependency for this process's database mode (ASYNC_DB)."""
+    return get_current_user_async if ASYNC_DB else get_current_user
+
+async def get_current_active_user(current_user: models.User = Depends(get_user_dep())):
     if not current_user:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
@@ -0,0 +1,150 @@
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import models, schemas, rollups, sync, hierarchy, subtrees
+
+def _result(operation: str, index: int, item_id: Optional[int], detail: Optional[str] = None):
+    return schemas.BatchItemResult(
+        operation=operation, index=index, id=item_id, ok=detail is None, detail=detail
+    )
+
+_OPERATIONS = ("create", "update", "delete")
+
+def _ordered(results):
+    return sorted(results, key=lambda r: (_OPERATIONS.index(r.operation), r.index))
+
+def _existing_ids(db: Session, model, ids: Iterable[int]) -> Set[int]:
+    ids = set(ids)
+    if not ids:
+        return set()
+    return set(db.execute(select(model.id).where(model.id.in_(ids))).scalars())
+
+def _column_values(model, data: dict) -> dict:
+    # Drop schema-only fields (e.g. TaskUpdate.plan_quantity) with no column
+    columns = model.__table__.columns
+    return {key: value for key, value in data.items() if key in columns}
+
+def bulk_insert(db: Session, model, rows: List[dict]) -> List[int]:
+    """Insert ``rows`` and return their new ids, in row order.
+
+    Batched as INSERT ... RETURNING through the model's insert sentinel, a
+    few statements however many rows. Callers that don't need the ids should
+    use a plain ``db.execute(insert(model), rows)``.
+    """
+    if not rows:
+        return []
+    statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+    return list(db.execute(statement, rows).scalars())
+
+def _bulk_update(db: Session, model, batch_updates, existing: Set[int], results, not_found: str,
+                 rejected: Optional[Dict[int, str]] = None):
+    rows = []
+    for index, item in enumerate(batch_updates):
+        if item.id not in existing:
+            results.append(_result("update", index, item.id, not_found))
+            continue
+        if rejected and index in rejected:
+            results.append(_result("update", index, item.id, rejected[index]))
+            continue
+        values = _column_values(model, item.dict(exclude_unset=True))
+        if len(values) > 1:
+            rows.append(values)
+        results.append(_result("update", index, item.id))
+    if rows:
+        # ORM bulk UPDATE by primary key: one executemany per set of columns
+        db.execute(update(model), rows)
+    return [row["id"] for row in rows]
+
+def _check_deletes(batch_deletes, existing: Set[int], results, not_found: str) -> List[int]:
+    ids = []
+    for index, item_id in enumerate(batch_deletes):
+        if item_id not in existing:
+            results.append(_result("delete", index, item_id, not_found))
+            continue
+        ids.append(item_id)
+        results.append(_result("delete", index, item_id))
+    return ids
+
+def apply_manpower_batch(db: Session, batch: schemas.ManpowerBatch, owner_id: int) -> List[schemas.BatchItemResult]:
+    """Apply a manpower batch in one transaction and report each item."""
+    not_found = "Manpower record not found"
+    results = []
+    existing = _existing_ids(
+        db, models.Manpower, [item.id for item in batch.update] + batch.delete
+    )
+
+    rows = [{**item.dict(), "user_owner_id": owner_id} for item in batch.create]
+    for index, new_id in enumerate(bulk_insert(db, models.Manpower, rows)):
+        results.append(_result("create", index, new_id))
+
+    _bulk_update(db, models.Manpower, batch.update, existing, results, not_found)
+
+    delete_ids = _check_deletes(batch.delete, existing, results, not_found)
+    if delete_ids:
+        db.execute(delete(models.Manpower).where(models.Manpower.id.in_(delete_ids)))
+        sync.log_deletions(db, "manpower", delete_ids)
+
+    db.commit()
+    return _ordered(results)
+
+def apply_task_batch(db: Session, batch: schemas.TaskBatch) -> List[schemas.BatchItemResult]:
+    """Apply a task batch in one transaction and report each item.
+
+    Roll-ups for every touched ancestor chain are recomputed once at the end.
+    """
+    not_found = "Task not found"
+    results = []
+    existing = _existing_ids(
+        db,
+        models.Task,
+        [item.id for item in batch.update]
+        + batch.delete
+        + [item.parent_task_id for item in batch.create if item.parent_task_id is not None],
+    )
+    changed = set()
+
+    rows = []
+    for index, item in enumerate(batch.create):
+        if item.parent_task_id is not None and item.parent_task_id not in existing:
+            results.append(_result("create", index, None, "Parent task not found"))
+            continue
+        rows.append((index, item.dict()))
+    new_ids = bulk_insert(db, models.Task, [row for _, row in rows])
+    for (index, _), new_id in zip(rows, new_ids):
+        results.append(_result("create", index, new_id))
+    hierarchy.add_tasks(db, new_ids)
+    changed.update(new_ids)
+
+    # Moves are checked and applied one by one, so each sees the ones before it
+    rejected = {}
+    for index, item in enumerate(batch.update):
+        if item.id not in existing or "parent_task_id" not in item.model_fields_set:
+            continue
+        detail = hierarchy.invalid_parent(db, item.id, item.parent_task_id)
+        if detail is not None:
+            rejected[index] = detail
+            continue
+        old_parent_id = db.execute(
+            select(models.Task.parent_task_id).where(models.Task.id == item.id)
+        ).scalar()
+        if old_parent_id != item.parent_task_id:
+            hierarchy.move(db, item.id, item.parent_task_id)
+            if old_parent_id is not None:
+                changed.add(old_parent_id)
+    changed.update(_bulk_update(db, models.Task, batch.update, existing, results, not_found, rejected))
+
+    delete_ids = _check_deletes(batch.delete, existing, results, not_found)
+    if delete_ids:
+        parents = db.execute(
+            select(models.Task.parent_task_id)
+            .where(models.Task.id.in_(delete_ids), models.Task.parent_task_id.isnot(None))
+        ).scalars()
+        changed.update(parents)
+        # Same as a single delete: subtasks go with their parent
+        subtrees.delete_subtrees(db, delete_ids)
+
+    rollups.refresh_chains(db, changed)
+    db.commit()
+    return _ordered(results)
@@ -0,0 +1,66 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ``ttl`` seconds.
+
+    ``maxsize`` bounds the number of entries, or with ``getsizeof`` the sum
+    of ``getsizeof(value)`` over them (e.g. a byte budget with ``len``).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, getsizeof: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.getsizeof = getsizeof or (lambda value: 1)
+        self.currsize = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._data.pop(key)
+        self.currsize -= size
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        size = self.getsizeof(value)
+        if size > self.maxsize:
+            return
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (time.monotonic() + self.ttl, value, size)
+            self.currsize += size
+            while self.currsize > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def discard_keys(self, predicate: Callable[[Hashable], bool]):
+        """Drop every entry whose key matches ``predicate``."""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.currsize = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
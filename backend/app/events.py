@@ -0,0 +1,115 @@
+"""In-process change feed for Server-Sent Events subscribers.
+
+Commits that touch a collection publish ``{"type": "change", "collection":
+...}``. Clients react by fetching ``/api/sync`` or revalidating their list
+with ``If-None-Match``. Each subscriber has a bounded queue; one that falls
+behind has its backlog replaced by a single ``resync`` event instead of
+growing without limit.
+
+Writes made by other worker processes are picked up by polling
+``collection_versions`` every ``EVENTS_POLL_SECONDS`` while anyone is
+subscribed (0 disables polling, enough for a single worker).
+"""
+import asyncio
+import json
+import os
+from typing import AsyncIterator, Dict, Optional, Set
+
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from . import models
+from .database import SessionLocal
+
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "0"))
+
+RESYNC = {"type": "resync"}
+
+def _read_versions() -> Dict[str, int]:
+    db = SessionLocal()
+    try:
+        return dict(db.query(models.CollectionVersion.name, models.CollectionVersion.version).all())
+    finally:
+        db.close()
+
+class ChangeBroker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._poller: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> asyncio.Queue:
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if EVENTS_POLL_SECONDS > 0 and self._poller is None:
+            self._poller = self._loop.create_task(self._poll())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        """Queue ``event`` for every subscriber; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or not self._subscribers or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(event)
+        else:
+            loop.call_soon_threadsafe(self._deliver, event)
+
+    def _deliver(self, event: dict):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Too far behind to catch up event by event
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    async def _poll(self):
+        try:
+            seen = await run_in_threadpool(_read_versions)
+            while self._subscribers:
+                await asyncio.sleep(EVENTS_POLL_SECONDS)
+                current = await run_in_threadpool(_read_versions)
+                for collection, version in current.items():
+                    if seen.get(collection) != version:
+                        self._deliver({"type": "change", "collection": collection})
+                seen = current
+        finally:
+            self._poller = None
+
+broker = ChangeBroker(EVENTS_QUEUE_SIZE)
+
+def _format(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+async def stream(request: Request) -> AsyncIterator[str]:
+    queue = broker.subscribe()
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keepalive\n\n"
+                continue
+            yield _format(event)
+    finally:
+        broker.unsubscribe(queue)
@@ -0,0 +1,59 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Iterator
+
+from sqlalchemy import select
+
+from . import models
+from .database import SessionLocal
+
+YIELD_PER = 1000
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def _csv_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def stream_table(model, file_format: str) -> Iterator[str]:
+    """Yield a whole table as NDJSON or CSV, one fetch batch at a time.
+
+    Uses its own session so the response can outlive the request's session,
+    and a server-side cursor (``yield_per``) so memory stays flat.
+    """
+    table = model.__table__
+    columns = [column.name for column in table.columns if column.name != models.SENTINEL_COLUMN]
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            select(*(table.c[name] for name in columns)).order_by(table.c.id),
+            execution_options={"yield_per": YIELD_PER},
+        )
+        if file_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+            for partition in result.partitions():
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows([_csv_value(value) for value in row] for row in partition)
+                yield buffer.getvalue()
+        else:
+            for partition in result.partitions():
+                yield "".join(
+                    json.dumps(dict(zip(columns, row)), default=_json_default) + "\n"
+                    for row in partition
+                )
+    finally:
+        db.close()
@@ -0,0 +1,127 @@
+"""Site fixtures: users, task trees and manpower loaded in bulk.
+
+A JSON fixture is an object with optional ``users``, ``tasks`` and
+``manpower`` lists. Tasks nest their children under ``subtasks``, the same
+shape ``GET /api/tasks/`` returns. Each tree level is inserted with a batched
+INSERT ... RETURNING, one statement per thousand or so tasks of the level.
+
+An xlsx fixture has one sheet per list, named ``users``, ``tasks`` and
+``manpower``, laid out like the import files. A task row links to an
+earlier row through a ``parent`` (task name) or ``parent_row`` column.
+"""
+import json
+import os
+from typing import Dict, IO, Iterator, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models, schemas, rollups, hierarchy
+from .auth import get_password_hash
+from .batch import bulk_insert
+from .importer import table_rows, widen_dates
+
+COLLECTIONS = ("users", "tasks", "manpower")
+FORMATS = ("json", "xlsx")
+
+def nest_tasks(rows: Iterator[Tuple[int, dict]]) -> List[dict]:
+    """Build task trees from flat rows that reference their parent row or name."""
+    roots: List[dict] = []
+    by_row: Dict[int, dict] = {}
+    by_name: Dict[str, dict] = {}
+    for row_number, values in rows:
+        parent_row = values.pop("parent_row", None)
+        parent_name = values.pop("parent", None)
+        node = {**values, "subtasks": []}
+        if parent_row is not None:
+            parent = by_row.get(int(parent_row))
+            if parent is None:
+                raise ValueError(f"tasks row {row_number}: parent row {parent_row} not found")
+            parent["subtasks"].append(node)
+        elif parent_name is not None:
+            parent = by_name.get(str(parent_name))
+            if parent is None:
+                raise ValueError(f"tasks row {row_number}: parent task '{parent_name}' not found")
+            parent["subtasks"].append(node)
+        else:
+            roots.append(node)
+        by_row[row_number] = node
+        by_name.setdefault(str(values.get("name")), node)
+    return roots
+
+def read_xlsx(file: IO[bytes]) -> dict:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise RuntimeError("openpyxl is required to load xlsx fixtures")
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    data = {}
+    for name in COLLECTIONS:
+        if name in workbook.sheetnames:
+            rows = table_rows(enumerate(workbook[name].iter_rows(values_only=True), start=1))
+            data[name] = nest_tasks(rows) if name == "tasks" else [values for _, values in rows]
+    return data
+
+def read_fixture(path: str, file_format: Optional[str] = None) -> dict:
+    file_format = file_format or os.path.splitext(path)[1].lstrip(".").lower()
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported fixture format: {file_format}")
+    with open(path, "rb") as file:
+        if file_format == "xlsx":
+            return read_xlsx(file)
+        return json.load(file)
+
+def _load_users(db: Session, users: List[dict]) -> int:
+    rows = []
+    for values in users:
+        user = schemas.UserCreate(**values)
+        rows.append({
+            **user.dict(exclude={"password"}),
+            "hashed_password": get_password_hash(user.password),
+        })
+    if rows:
+        db.execute(insert(models.User), rows)
+    return len(rows)
+
+def _load_tasks(db: Session, tasks: List[dict], owner_id: Optional[int]) -> int:
+    inserted: List[int] = []
+    level: List[Tuple[Optional[int], dict]] = [(None, node) for node in tasks]
+    while level:
+        rows = []
+        for parent_id, node in level:
+            values = widen_dates({key: value for key, value in node.items() if key != "subtasks"})
+            values["parent_task_id"] = parent_id
+            rows.append({**schemas.TaskCreate(**values).dict(), "user_owner_id": owner_id})
+        ids = bulk_insert(db, models.Task, rows)
+        inserted += ids
+        level = [
+            (task_id, child)
+            for task_id, (_, node) in zip(ids, level)
+            for child in node.get("subtasks") or []
+        ]
+    hierarchy.add_tasks(db, inserted)
+    rollups.refresh_chains(db, inserted)
+    return len(inserted)
+
+def _load_manpower(db: Session, manpower: List[dict], owner_id: Optional[int]) -> int:
+    rows = [
+        {**schemas.ManpowerCreate(**widen_dates(dict(values))).dict(), "user_owner_id": owner_id}
+        for values in manpower
+    ]
+    if rows:
+        db.execute(insert(models.Manpower), rows)
+    return len(rows)
+
+def load_fixture(db: Session, data: dict, owner_id: Optional[int] = None) -> Dict[str, int]:
+    """Insert a fixture in one transaction; returns the row count per list.
+
+    Raises pydantic's ValidationError or ValueError on the first bad entry,
+    leaving the caller to roll back.
+    """
+    counts = {
+        "users": _load_users(db, data.get("users") or []),
+        "tasks": _load_tasks(db, data.get("tasks") or [], owner_id),
+        "manpower": _load_manpower(db, data.get("manpower") or [], owner_id),
+    }
+    db.commit()
+    return counts
@@ -0,0 +1,111 @@
+"""Closure table for the task tree.
+
+``task_closure`` holds a row for every (ancestor, descendant) pair, each
+task paired with itself at depth 0. A subtree, an ancestor chain or a
+task's depth is then one indexed lookup rather than a recursive walk, and a
+subtree moves with two set-based statements.
+
+Every write path that adds, re-parents or deletes tasks updates the table in
+the same transaction. ``rebuild`` recomputes it from ``parent_task_id``
+(``python rebuild_hierarchy.py``).
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, true
+from sqlalchemy.orm import Session, aliased
+
+from . import models
+
+CHUNK_SIZE = 5000
+# Deeper than any real plan; stops the walk if parent links ever form a cycle
+MAX_DEPTH = 1000
+
+Closure = models.TaskClosure
+COLUMNS = ["ancestor_id", "descendant_id", "depth"]
+
+def _paths(*criteria):
+    """Rows for the tasks matching ``criteria``, found by walking parent links."""
+    paths = (
+        select(
+            models.Task.id.label("ancestor_id"),
+            models.Task.id.label("descendant_id"),
+            literal(0).label("depth"),
+        )
+        .where(*criteria)
+        .cte("paths", recursive=True)
+    )
+    paths = paths.union_all(
+        select(models.Task.parent_task_id, paths.c.descendant_id, paths.c.depth + 1)
+        .join(paths, models.Task.id == paths.c.ancestor_id)
+        .where(models.Task.parent_task_id.is_not(None), paths.c.depth < MAX_DEPTH)
+    )
+    return select(paths.c.ancestor_id, paths.c.descendant_id, paths.c.depth)
+
+def add_tasks(db: Session, task_ids: Iterable[int]):
+    """Add rows for newly inserted tasks, in any order.
+
+    Walks ``parent_task_id`` up from each new task, so a batch may contain
+    both a parent and its children.
+    """
+    task_ids = list(task_ids)
+    for start in range(0, len(task_ids), CHUNK_SIZE):
+        chunk = task_ids[start:start + CHUNK_SIZE]
+        db.execute(insert(Closure).from_select(COLUMNS, _paths(models.Task.id.in_(chunk))))
+
+def move(db: Session, task_id: int, parent_id: Optional[int]):
+    """Re-hang the subtree of ``task_id`` under ``parent_id`` (None for a root)."""
+    subtree = select(Closure.descendant_id).where(Closure.ancestor_id == task_id)
+    # Cut the subtree loose from its old ancestors, keeping its own paths
+    db.execute(
+        delete(Closure)
+        .where(Closure.descendant_id.in_(subtree), Closure.ancestor_id.not_in(subtree))
+        .execution_options(synchronize_session=False)
+    )
+    if parent_id is None:
+        return
+    above = aliased(Closure)
+    below = aliased(Closure)
+    db.execute(
+        insert(Closure).from_select(
+            COLUMNS,
+            # Every new ancestor paired with every task in the subtree
+            select(above.ancestor_id, below.descendant_id, above.depth + below.depth + 1)
+            .join(below, true())
+            .where(above.descendant_id == parent_id, below.ancestor_id == task_id),
+        )
+    )
+
+def invalid_parent(db: Session, task_id: int, parent_id: Optional[int]) -> Optional[str]:
+    """Why ``task_id`` can't move under ``parent_id``, or None if it can."""
+    if parent_id is None:
+        return None
+    if db.get(models.Task, parent_id) is None:
+        return "Parent task not found"
+    if is_within(db, parent_id, task_id):
+        return "A task cannot be moved under itself or one of its subtasks"
+    return None
+
+def ancestor_ids(db: Session, task_id: Optional[int]) -> List[int]:
+    """Return ``task_id`` and the ids of all of its ancestors, nearest first."""
+    if task_id is None:
+        return []
+    return list(db.execute(
+        select(Closure.ancestor_id)
+        .where(Closure.descendant_id == task_id)
+        .order_by(Closure.depth)
+    ).scalars())
+
+def is_within(db: Session, task_id: int, ancestor_id: int) -> bool:
+    """Whether ``task_id`` is ``ancestor_id`` or one of its descendants."""
+    return db.execute(
+        select(Closure.depth)
+        .where(Closure.ancestor_id == ancestor_id, Closure.descendant_id == task_id)
+    ).first() is not None
+
+def rebuild(db: Session) -> int:
+    """Recompute the whole table from ``parent_task_id``. Returns the row count."""
+    db.execute(delete(Closure))
+    db.execute(insert(Closure).from_select(COLUMNS, _paths()))
+    count = db.execute(select(func.count()).select_from(Closure)).scalar()
+    db.commit()
+    return count
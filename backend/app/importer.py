@@ -0,0 +1,309 @@
+"""Streaming CSV/xlsx import of tasks and manpower.
+
+Rows are read one at a time, validated against the create schemas and
+inserted in chunks, so a file of any size is never held in memory.
+
+Task files may link each row to its parent task with either a ``parent``
+column (the name of a task earlier in the file or already in the database)
+or a ``parent_row`` column (the sheet row number of an earlier row). A plain
+``parent_task_id`` also works.
+
+The header is the first non-blank row. An xlsx import reads the sheet named
+by ``sheet``, or else the first sheet with any content. A file whose header
+lacks a column the create schema requires is rejected before any row is read.
+"""
+import csv
+import io
+import itertools
+import zipfile
+from datetime import date, datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models, schemas, rollups, hierarchy
+from .batch import bulk_insert
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 100
+FORMATS = ("csv", "xlsx")
+KINDS = ("tasks", "manpower")
+READ_ERRORS = (csv.Error, zipfile.BadZipFile, UnicodeDecodeError, KeyError)
+_SCHEMAS = {"tasks": schemas.TaskCreate, "manpower": schemas.ManpowerCreate}
+# Columns read by the loaders rather than the schema
+_EXTRA_COLUMNS = {"tasks": {"parent", "parent_row"}, "manpower": set()}
+# Spreadsheets often hold plain dates where the schemas expect datetimes
+DATE_COLUMNS = ("date", "start_time", "due_time")
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    return extension if extension in FORMATS else None
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+def widen_dates(values: dict) -> dict:
+    for column in DATE_COLUMNS:
+        value = values.get(column)
+        if isinstance(value, str) and len(value) == 10:
+            try:
+                values[column] = datetime.combine(date.fromisoformat(value), datetime.min.time())
+            except ValueError:
+                pass
+    return values
+
+def _blank(row: Sequence) -> bool:
+    return all(_clean(cell) is None for cell in row)
+
+def _sheet_rows(workbook, sheet: Optional[str]) -> Iterator[Tuple[int, tuple]]:
+    if sheet is not None:
+        if sheet not in workbook.sheetnames:
+            raise ValueError(f"Sheet '{sheet}' not found; the file has {', '.join(workbook.sheetnames)}")
+        return enumerate(workbook[sheet].iter_rows(values_only=True), start=1)
+    # workbook.active is whichever sheet was last open in Excel
+    for worksheet in workbook.worksheets:
+        rows = enumerate(worksheet.iter_rows(values_only=True), start=1)
+        for row_number, row in rows:
+            if not _blank(row):
+                return itertools.chain([(row_number, row)], rows)
+    return iter(())
+
+def _raw_rows(file: IO[bytes], file_format: str, sheet: Optional[str]) -> Iterator[Tuple[int, tuple]]:
+    if file_format == "csv":
+        text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+        reader = csv.reader(text)
+        return ((reader.line_num, row) for row in reader)
+    if file_format == "xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise RuntimeError("openpyxl is required to import xlsx files")
+        # read_only streams rows from the archive instead of building the sheet
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        return _sheet_rows(workbook, sheet)
+    raise ValueError(f"Unsupported format: {file_format}")
+
+def _reading(rows: Iterator[Tuple[int, dict]], file_format: str) -> Iterator[Tuple[int, dict]]:
+    try:
+        yield from rows
+    except READ_ERRORS as e:
+        raise ValueError(f"Could not read {file_format} file: {e}")
+
+def read_rows(file: IO[bytes], file_format: str, kind: Optional[str] = None,
+              sheet: Optional[str] = None) -> Iterator[Tuple[int, dict]]:
+    """Yield ``(sheet row number, {column: value})`` for each data row.
+
+    With ``kind`` the header must hold every column that import requires.
+    Raises ValueError if the file can't be read or the header doesn't fit.
+    """
+    known, required = None, ()
+    if kind is not None:
+        schema = _SCHEMAS[kind]
+        known = set(schema.model_fields) | _EXTRA_COLUMNS[kind]
+        required = [name for name, field in schema.model_fields.items() if field.is_required()]
+    try:
+        rows = table_rows(_raw_rows(file, file_format, sheet), known, required)
+    except READ_ERRORS as e:
+        raise ValueError(f"Could not read {file_format} file: {e}")
+    return _reading(rows, file_format)
+
+def table_rows(rows: Iterable[Tuple[int, tuple]], known: Optional[set] = None,
+               required: Sequence[str] = ()) -> Iterator[Tuple[int, dict]]:
+    """Turn numbered raw rows, header first, into ``(row number, values)``.
+
+    The header is read at once: raises ValueError if it has none of the
+    ``known`` columns (when given) or lacks one of the ``required`` ones.
+    """
+    rows = iter(rows)
+    header = None
+    for _, row in rows:
+        if not _blank(row):
+            header = [str(_clean(cell) or "").lower() for cell in row]
+            break
+    if known is not None and not known.intersection(header or ()):
+        raise ValueError(f"No recognized column headers; expected {', '.join(sorted(known))}")
+    missing = [column for column in required if column not in (header or ())]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    if header is None:
+        return iter(())
+    return _data_rows(header, rows)
+
+def _data_rows(header: List[str], rows: Iterator[Tuple[int, tuple]]) -> Iterator[Tuple[int, dict]]:
+    for row_number, row in rows:
+        values = {
+            column: _clean(cell)
+            for column, cell in zip(header, row)
+            if column and _clean(cell) is not None
+        }
+        if values:
+            yield row_number, widen_dates(values)
+
+def take(rows: Iterator[Tuple[int, dict]], count: int = CHUNK_SIZE) -> List[Tuple[int, dict]]:
+    """The next ``count`` rows, parsed; empty once the file is exhausted."""
+    return list(itertools.islice(rows, count))
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}"
+            for err in error.errors()
+        )
+    return str(error)
+
+class _Report:
+    def __init__(self):
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[schemas.ImportRowError] = []
+
+    def fail(self, row_number: int, error: Exception):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(schemas.ImportRowError(row=row_number, detail=_error_message(error)))
+
+    def result(self) -> schemas.ImportResult:
+        return schemas.ImportResult(imported=self.imported, failed=self.failed, errors=self.errors)
+
+class _ManpowerLoader:
+    """Inserts manpower records in chunks."""
+
+    def __init__(self, db: Session, report: _Report, owner_id: Optional[int]):
+        self.db = db
+        self.report = report
+        self.owner_id = owner_id
+        self.pending: List[dict] = []
+
+    def flush(self):
+        if not self.pending:
+            return
+        # No ids needed: a plain executemany
+        self.db.execute(insert(models.Manpower), self.pending)
+        self.report.imported += len(self.pending)
+        self.pending.clear()
+
+    def add(self, row_number: int, values: dict):
+        manpower = schemas.ManpowerCreate(**values)
+        self.pending.append({**manpower.dict(), "user_owner_id": self.owner_id})
+        if len(self.pending) >= CHUNK_SIZE:
+            self.flush()
+
+class _TaskLoader:
+    """Inserts tasks in chunks while resolving parent references."""
+
+    def __init__(self, db: Session, report: _Report):
+        self.db = db
+        self.report = report
+        self.pending: List[Tuple[int, str, dict]] = []
+        self.pending_rows = set()
+        self.pending_names = set()
+        # Only ids are kept per row, never the row data itself
+        self.ids_by_row: Dict[int, int] = {}
+        self.ids_by_name: Dict[str, Optional[int]] = {}
+        self.known_ids = set()
+
+    def flush(self):
+        if not self.pending:
+            return
+        ids = bulk_insert(self.db, models.Task, [values for _, _, values in self.pending])
+        for (row_number, name, _), task_id in zip(self.pending, ids):
+            self.ids_by_row[row_number] = task_id
+            self.ids_by_name[name] = task_id
+            self.known_ids.add(task_id)
+        hierarchy.add_tasks(self.db, ids)
+        rollups.refresh_chains(self.db, ids)
+        self.report.imported += len(ids)
+        self.pending.clear()
+        self.pending_rows.clear()
+        self.pending_names.clear()
+
+    def _by_name(self, name: str) -> int:
+        if name in self.pending_names:
+            self.flush()
+        if name not in self.ids_by_name:
+            existing = self.db.query(models.Task.id).filter(
+                models.Task.name == name
+            ).order_by(models.Task.id).first()
+            self.ids_by_name[name] = existing[0] if existing else None
+        if self.ids_by_name[name] is None:
+            raise ValueError(f"Parent task '{name}' not found")
+        return self.ids_by_name[name]
+
+    def _by_row(self, reference) -> int:
+        try:
+            row_number = int(reference)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid parent_row '{reference}'")
+        if row_number in self.pending_rows:
+            self.flush()
+        if row_number not in self.ids_by_row:
+            raise ValueError(f"Parent row {row_number} was not imported")
+        return self.ids_by_row[row_number]
+
+    def _by_id(self, reference) -> int:
+        try:
+            task_id = int(reference)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid parent_task_id '{reference}'")
+        if task_id not in self.known_ids:
+            if self.db.get(models.Task, task_id) is None:
+                raise ValueError(f"Parent task {task_id} not found")
+            self.known_ids.add(task_id)
+        return task_id
+
+    def add(self, row_number: int, values: dict):
+        parent_name = values.pop("parent", None)
+        parent_row = values.pop("parent_row", None)
+        if parent_row is not None:
+            values["parent_task_id"] = self._by_row(parent_row)
+        elif parent_name is not None:
+            values["parent_task_id"] = self._by_name(str(parent_name))
+        elif values.get("parent_task_id") is not None:
+            values["parent_task_id"] = self._by_id(values["parent_task_id"])
+
+        task = schemas.TaskCreate(**values)
+        self.pending.append((row_number, task.name, task.dict()))
+        self.pending_rows.add(row_number)
+        self.pending_names.add(task.name)
+        if len(self.pending) >= CHUNK_SIZE:
+            self.flush()
+
+class Import:
+    """An import in one transaction: feed it rows, then ``finish`` to commit."""
+
+    def __init__(self, db: Session, kind: str, owner_id: Optional[int] = None):
+        self.db = db
+        self.report = _Report()
+        if kind == "tasks":
+            self.loader = _TaskLoader(db, self.report)
+        else:
+            self.loader = _ManpowerLoader(db, self.report, owner_id)
+
+    def add_rows(self, rows: Iterable[Tuple[int, dict]]):
+        for row_number, values in rows:
+            try:
+                self.loader.add(row_number, values)
+            except (ValidationError, ValueError) as e:
+                self.report.fail(row_number, e)
+
+    def finish(self) -> schemas.ImportResult:
+        self.loader.flush()
+        self.db.commit()
+        return self.report.result()
+
+def import_file(db: Session, kind: str, file: IO[bytes], file_format: str,
+                owner_id: Optional[int] = None, sheet: Optional[str] = None) -> schemas.ImportResult:
+    """Import an uploaded file; raises ValueError if it can't be read."""
+    rows = read_rows(file, file_format, kind, sheet)
+    try:
+        target = Import(db, kind, owner_id)
+        target.add_rows(rows)
+        return target.finish()
+    except ValueError:
+        db.rollback()
+        raise
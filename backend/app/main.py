@@ -1,19 +1,24 @@
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, File, HTTPException, Query, Request, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
-from datetime import timedelta
-from typing import List
+from datetime import datetime, timedelta
+from typing import List, Literal, Optional
 from fastapi import APIRouter
 
-from . import models, schemas, auth
-from .database import engine, get_db
-
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+from . import models, schemas, auth, tree, pagination, rollups, analytics, database, async_routes, batch, importer, export, versions, sync, events, serialization, metrics, querylog, search, timeline, hierarchy, subtrees
+from .database import get_db
 
 app = FastAPI(title="Project Dashboard API", version="1.0.0")
 
+# Tables are created by migrations (`alembic upgrade head`), not on boot
+@app.on_event("startup")
+def check_schema():
+    database.check_schema()
+
 api_router = APIRouter()
 
 # CORS middleware
@@ -30,14 +35,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# Per-route latency/status metrics and pool usage, served on /metrics
+app.add_middleware(metrics.MetricsMiddleware)
+metrics.instrument_engine(database.engine, "sync")
+if database.async_engine is not None:
+    metrics.instrument_engine(database.async_engine.sync_engine, "async")
+
+# Query count/time per request in Server-Timing, slow query and N+1 warnings
+app.add_middleware(querylog.QueryLogMiddleware)
+querylog.instrument_engine(database.engine)
+if database.async_engine is not None:
+    querylog.instrument_engine(database.async_engine.sync_engine)
+
 @api_router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -50,8 +68,7 @@ async def login_for_access_token(
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
-@api_router.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+def _check_new_user(db: Session, user: schemas.UserCreate):
     db_user = db.query(models.User).filter(models.User.username == user.username).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
@@ -59,8 +76,8 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(models.User).filter(models.User.email == user.email).first()
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
-    
-    hashed_password = auth.get_password_hash(user.password)
+
+def _insert_user(db: Session, user: schemas.UserCreate, hashed_password: str) -> models.User:
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -70,101 +87,59 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
+    auth.invalidate_user(db_user.username)
     return db_user
 
+@api_router.post("/users/", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+    # Queries run in the threadpool and bcrypt on its own pool, never on the loop
+    await run_in_threadpool(_check_new_user, db, user)
+    hashed_password = await auth.get_password_hash_async(user.password)
+    return await run_in_threadpool(_insert_user, db, user, hashed_password)
+
 @api_router.get("/users/me/", response_model=schemas.User)
 async def read_users_me(current_user: models.User = Depends(auth.get_current_active_user)):
     return current_user
 
 @api_router.get("/tasks/", response_model=List[schemas.Task])
 def get_tasks(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    shape: Literal["tree", "flat"] = "tree",
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
-    # Get only top-level tasks (no parent)
-    tasks = db.query(models.Task).filter(
-        models.Task.parent_task_id.is_(None)
-    ).offset(skip).limit(limit).all()
+    # Only the requested columns are read
+    selected = tree.select_fields(fields)
     
-    # Convert to response format with subtasks
-    def build_task_tree(task):
-        task_dict = {
-            "id": task.id,
-            "name": task.name,
-            "description": task.description,
-            "start_time": task.start_time,
-            "due_time": task.due_time,
-            "total_job": task.total_job,
-            "completed": task.completed,
-            "stuck": task.stuck,
-            "est_duration": task.est_duration,
-            "est_cost": task.est_cost,
-            "status": task.status,
-            "owner": task.owner,
-            "parent_task_id": task.parent_task_id,
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
-            "subtasks": []
-        }
+    def build():
+        # Get only top-level tasks (no parent)
+        query = db.query(*tree.task_columns(selected)).filter(
+            models.Task.parent_task_id.is_(None)
+        ).order_by(models.Task.id)
         
-        # Get subtasks (max 2 levels)
-        subtasks = db.query(models.Task).filter(
-            models.Task.parent_task_id == task.id
-        ).all()
+        # A cursor seeks past the last seen id; skip is kept for older clients
+        if cursor is not None:
+            (last_id,) = pagination.decode_cursor(cursor, 1)
+            query = query.filter(models.Task.id > pagination.decode_int(last_id))
+        else:
+            query = query.offset(skip)
+        tasks = query.limit(limit).all()
         
-        for subtask in subtasks:
-            subtask_dict = {
-                "id": subtask.id,
-                "name": subtask.name,
-                "description": subtask.description,
-                "start_time": subtask.start_time,
-                "due_time": subtask.due_time,
-                "total_job": subtask.total_job,
-                "completed": subtask.completed,
-                "stuck": subtask.stuck,
-                "est_duration": subtask.est_duration,
-                "est_cost": subtask.est_cost,
-                "status": subtask.status,
-                "owner": subtask.owner,
-                "parent_task_id": subtask.parent_task_id,
-                "created_at": subtask.created_at,
-                "updated_at": subtask.updated_at,
-                "subtasks": []
-            }
-            
-            # Get nested subtasks (level 2)
-            nested_subtasks = db.query(models.Task).filter(
-                models.Task.parent_task_id == subtask.id
-            ).all()
-            
-            for nested_subtask in nested_subtasks:
-                nested_dict = {
-                    "id": nested_subtask.id,
-                    "name": nested_subtask.name,
-                    "description": nested_subtask.description,
-                    "start_time": nested_subtask.start_time,
-                    "due_time": nested_subtask.due_time,
-                    "total_job": nested_subtask.total_job,
-                    "completed": nested_subtask.completed,
-                    "stuck": nested_subtask.stuck,
-                    "est_duration": nested_subtask.est_duration,
-                    "est_cost": nested_subtask.est_cost,
-                    "status": nested_subtask.status,
-                    "owner": nested_subtask.owner,
-                    "parent_task_id": nested_subtask.parent_task_id,
-                    "created_at": nested_subtask.created_at,
-                    "updated_at": nested_subtask.updated_at,
-                    "subtasks": []
-                }
-                subtask_dict["subtasks"].append(nested_dict)
-            
-            task_dict["subtasks"].append(subtask_dict)
+        headers = {}
+        if tasks and len(tasks) == limit:
+            headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(tasks[-1].id)
         
-        return task_dict
+        # Load every level of subtasks in one query; flat skips the nesting
+        if shape == "flat":
+            return tree.flatten_task_forest(db, tasks, selected), headers
+        return tree.build_task_forest(db, tasks, selected), headers
     
-    return [build_task_tree(task) for task in tasks]
+    # Unchanged polls get a 304 or the cached body without touching the tree
+    return versions.conditional_response(request, db, "tasks", build)
 
 @api_router.post("/tasks/", response_model=schemas.Task)
 def create_task(
@@ -172,24 +147,158 @@ def create_task(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_admin)
 ):
+    if task.parent_task_id is not None and db.get(models.Task, task.parent_task_id) is None:
+        raise HTTPException(status_code=400, detail="Parent task not found")
     db_task = models.Task(
         **task.dict()
     )
+    rollups.init_rollups(db_task)
     db.add(db_task)
+    db.flush()
+    hierarchy.add_tasks(db, [db_task.id])
+    
+    # Only the new task's ancestor chain needs its roll-ups adjusted
+    ancestors = hierarchy.ancestor_ids(db, db_task.parent_task_id)
+    rollups.apply_delta(db, ancestors, rollups.own_values(db_task))
+    
     db.commit()
     db.refresh(db_task)
-    return db_task
+    return tree.build_task_forest(db, [db_task])[0]
+
+@api_router.post("/tasks/batch", response_model=schemas.BatchResult)
+def batch_tasks(
+    task_batch: schemas.TaskBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    return {"results": batch.apply_task_batch(db, task_batch)}
+
+def _import_upload(db: Session, kind: str, file: UploadFile, file_format: Optional[str],
+                   sheet: Optional[str], owner_id: int):
+    file_format = file_format or importer.detect_format(file.filename)
+    if file_format not in importer.FORMATS:
+        raise HTTPException(status_code=400, detail="File must be .csv or .xlsx")
+    try:
+        return importer.import_file(db, kind, file.file, file_format, owner_id, sheet)
+    except (ValueError, RuntimeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@api_router.post("/tasks/import", response_model=schemas.ImportResult)
+def import_tasks(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    sheet: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    return _import_upload(db, "tasks", file, format, sheet, current_user.id)
+
+def _export_response(model, file_format: str, filename: str):
+    return StreamingResponse(
+        export.stream_table(model, file_format),
+        media_type=export.MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{file_format}"'},
+    )
+
+@api_router.get("/tasks/export")
+def export_tasks(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    # Streams its own session, so memory and time-to-first-byte stay flat
+    return _export_response(models.Task, format, "tasks")
+
+@api_router.get("/tasks/summary", response_model=schemas.TaskSummary)
+def get_task_summary(
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    # Top-level roll-ups already include every subtask
+    totals = db.query(
+        *(func.coalesce(func.sum(getattr(models.Task, column)), 0)
+          for column in rollups.ROLLUP_FIELDS.values())
+    ).filter(models.Task.parent_task_id.is_(None)).one()
+    return dict(zip(rollups.ROLLUP_FIELDS, totals))
+
+@api_router.get("/tasks/search", response_model=List[schemas.TaskRecord])
+def search_tasks(
+    request: Request,
+    q: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    owner: Optional[str] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    overdue: Optional[bool] = None,
+    stuck: Optional[bool] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    def build():
+        # Flat matches at any depth, best first when searching text
+        tasks, next_cursor = search.search_tasks(
+            db, q, limit, cursor,
+            status=status, owner=owner,
+            start_from=start_from, start_to=start_to,
+            due_from=due_from, due_to=due_to,
+            overdue=overdue, stuck=stuck,
+        )
+        headers = {pagination.NEXT_CURSOR_HEADER: next_cursor} if next_cursor else {}
+        return serialization.rows_to_dicts(tasks, serialization.TASK_RECORD_FIELDS), headers
+
+    # Overdue depends on the clock as well as the data, so it can't be cached
+    if overdue is not None:
+        return serialization.json_response(*build())
+    return versions.conditional_response(request, db, "tasks", build)
+
+@api_router.get("/tasks/timeline", response_model=schemas.Timeline)
+def get_timeline(
+    request: Request,
+    start: datetime,
+    end: datetime,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+
+    def build():
+        # Interval index lookups; the parent chains come from one recursive query
+        fields = serialization.TASK_RECORD_FIELDS
+        return {
+            "tasks": serialization.rows_to_dicts(timeline.tasks_in_window(db, start, end), fields),
+            "ancestors": serialization.rows_to_dicts(timeline.ancestors_outside_window(db, start, end), fields),
+        }, {}
+
+    # Panning back to a window already seen is served from the response cache
+    return versions.conditional_response(request, db, "tasks", build)
 
 @api_router.get("/tasks/{task_id}", response_model=schemas.Task)
 def get_task(
     task_id: int,
+    fields: Optional[str] = None,
+    shape: Literal["tree", "flat"] = "tree",
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
-    task = db.query(models.Task).filter(models.Task.id == task_id).first()
+    selected = tree.select_fields(fields)
+    task = db.query(*tree.task_columns(selected)).filter(models.Task.id == task_id).first()
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    if shape == "flat":
+        return serialization.json_response(tree.flatten_task_forest(db, [task], selected))
+    return serialization.json_response(tree.build_task_forest(db, [task], selected)[0])
+
+def _locked_task(db: Session, task_id: int) -> models.Task:
+    # Row-locked until commit: the roll-up deltas pushed to the ancestors are
+    # computed from these values, which a concurrent write must not change
+    db_task = db.query(models.Task).filter(models.Task.id == task_id).with_for_update().first()
+    if db_task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return db_task
 
 @api_router.put("/tasks/{task_id}", response_model=schemas.Task)
 def update_task(
@@ -198,42 +307,95 @@ def update_task(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_admin)
 ):
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
+    db_task = _locked_task(db, task_id)
     
+    before = rollups.own_values(db_task)
     update_data = task_update.dict(exclude_unset=True)
+    parent_id = update_data.pop("parent_task_id", db_task.parent_task_id)
     for field, value in update_data.items():
         setattr(db_task, field, value)
     
+    if parent_id != db_task.parent_task_id:
+        # Re-parenting moves the whole branch and recomputes both ancestor chains
+        try:
+            subtrees.move_subtree(db, db_task, parent_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    else:
+        # Push the change in own values up through the task and its ancestors
+        delta = rollups.diff(before, rollups.own_values(db_task))
+        rollups.apply_delta(db, hierarchy.ancestor_ids(db, db_task.id), delta)
+    
     db.commit()
     db.refresh(db_task)
-    return db_task
+    return tree.build_task_forest(db, [db_task])[0]
+
+@api_router.post("/tasks/{task_id}/move", response_model=schemas.SubtreeChange)
+def move_task(
+    task_id: int,
+    move: schemas.TaskMove,
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    db_task = _locked_task(db, task_id)
+    
+    try:
+        count = subtrees.move_subtree(db, db_task, move.parent_task_id, dry_run)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if dry_run:
+        return {"message": "Dry run: nothing was moved", "task_id": task_id, "tasks": count, "dry_run": True}
+    db.commit()
+    return {"message": "Task moved successfully", "task_id": task_id, "tasks": count, "dry_run": False}
 
-@api_router.delete("/tasks/{task_id}")
+@api_router.delete("/tasks/{task_id}", response_model=schemas.SubtreeChange)
 def delete_task(
     task_id: int,
+    dry_run: bool = False,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.require_admin)
 ):
-    db_task = db.query(models.Task).filter(models.Task.id == task_id).first()
-    if db_task is None:
-        raise HTTPException(status_code=404, detail="Task not found")
+    db_task = _locked_task(db, task_id)
     
-    db.delete(db_task)
+    # Subtasks go with their parent, in a few set-based statements
+    count = subtrees.delete_subtree(db, db_task, dry_run)
+    if dry_run:
+        return {"message": "Dry run: nothing was deleted", "task_id": task_id, "tasks": count, "dry_run": True}
     db.commit()
-    return {"message": "Task deleted successfully"}
+    return {"message": "Task deleted successfully", "task_id": task_id, "tasks": count, "dry_run": False}
 
 # Manpower endpoints
 @api_router.get("/manpower/", response_model=List[schemas.Manpower])
 def get_manpower(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_active_user)
 ):
-    manpower = db.query(models.Manpower).offset(skip).limit(limit).all()
-    return manpower
+    def build():
+        query = db.query(models.Manpower).order_by(models.Manpower.date, models.Manpower.id)
+        
+        # A cursor seeks past the last seen (date, id); skip is kept for older clients
+        if cursor is not None:
+            last_date, last_id = pagination.decode_cursor(cursor, 2)
+            query = query.filter(
+                tuple_(models.Manpower.date, models.Manpower.id) >
+                tuple_(pagination.decode_datetime(last_date), pagination.decode_int(last_id))
+            )
+        else:
+            query = query.offset(skip)
+        manpower = query.limit(limit).all()
+        
+        headers = {}
+        if manpower and len(manpower) == limit:
+            last = manpower[-1]
+            headers[pagination.NEXT_CURSOR_HEADER] = pagination.encode_cursor(last.date, last.id)
+        return serialization.rows_to_dicts(manpower, serialization.MANPOWER_FIELDS), headers
+    
+    return versions.conditional_response(request, db, "manpower", build)
 
 @api_router.post("/manpower/", response_model=schemas.Manpower)
 def create_manpower(
@@ -250,6 +412,45 @@ def create_manpower(
     db.refresh(db_manpower)
     return db_manpower
 
+@api_router.post("/manpower/batch", response_model=schemas.BatchResult)
+def batch_manpower(
+    manpower_batch: schemas.ManpowerBatch,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    return {"results": batch.apply_manpower_batch(db, manpower_batch, current_user.id)}
+
+@api_router.post("/manpower/import", response_model=schemas.ImportResult)
+def import_manpower(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    sheet: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.require_admin)
+):
+    return _import_upload(db, "manpower", file, format, sheet, current_user.id)
+
+@api_router.get("/manpower/export")
+def export_manpower(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    return _export_response(models.Manpower, format, "manpower")
+
+@api_router.get("/manpower/analytics", response_model=List[schemas.ManpowerSummary])
+def get_manpower_analytics(
+    bucket: Literal["day", "week", "month"] = "day",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    # Grouped in SQL so only one row per bucket/type/work leaves the database
+    summary = analytics.manpower_summary(db, bucket, start_date, end_date)
+    return serialization.json_response(
+        serialization.rows_to_dicts(summary, serialization.MANPOWER_SUMMARY_FIELDS)
+    )
+
 @api_router.get("/manpower/{manpower_id}", response_model=schemas.Manpower)
 def get_manpower_by_id(
     manpower_id: int,
@@ -291,11 +492,48 @@ def delete_manpower(
         raise HTTPException(status_code=404, detail="Manpower record not found")
     
     db.delete(db_manpower)
+    sync.log_deletions(db, "manpower", [manpower_id])
     db.commit()
     return {"message": "Manpower record deleted successfully"}
 
+@api_router.get("/sync", response_model=schemas.SyncChanges)
+def get_changes(
+    since: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: models.User = Depends(auth.get_current_active_user)
+):
+    # Without a token this is a full snapshot; afterwards only the delta
+    changes = sync.changes_since(db, since)
+    changes["tasks"] = serialization.rows_to_dicts(changes["tasks"], serialization.TASK_RECORD_FIELDS)
+    changes["manpower"] = serialization.rows_to_dicts(changes["manpower"], serialization.MANPOWER_FIELDS)
+    return serialization.json_response(changes)
+
+@api_router.get("/events")
+async def stream_events(request: Request, token: Optional[str] = None):
+    # EventSource can't send headers, so the token may come as ?token=
+    if token is None:
+        scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+        token = credentials if scheme.lower() == "bearer" else None
+    await run_in_threadpool(auth.load_user, auth.token_subject(token))
+    return StreamingResponse(
+        events.stream(request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/")
 def read_root():
     return {"message": "Project Dashboard API"}
 
-app.include_router(api_router, prefix="/api") 
\ No newline at end of file
+@app.get("/health")
+def health():
+    return {"status": "ok", **auth.hashing_stats()}
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics(request: Request):
+    return metrics.metrics_response(request)
+
+if database.ASYNC_DB:
+    app.include_router(async_routes.asyncify_router(api_router), prefix="/api")
+else:
+    app.include_router(api_router, prefix="/api") 
\ No newline at end of file
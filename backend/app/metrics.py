@@ -0,0 +1,158 @@
+"""Prometheus metrics for routes, database pools and password hashing.
+
+``MetricsMiddleware`` labels each request with its route template (such as
+``/api/tasks/{task_id}``), never the raw path, so the number of series stays
+bounded. The template is found up front, the way the router will match it,
+so the in-flight gauge can carry it too; per request the cost is one pass
+over the route patterns, a few counter updates and one histogram
+observation.
+Pool occupancy, the bcrypt queue and SSE subscribers are read when
+``/metrics`` is scraped.
+"""
+import os
+import secrets
+import time
+from typing import Dict
+
+from fastapi import HTTPException, Request, Response, status
+from prometheus_client import (
+    REGISTRY, CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, disable_created_metrics, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Match
+
+from . import auth, events
+
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+# Skip the *_created sample that would accompany every labelled series
+disable_created_metrics()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+HOLD_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5, 30)
+
+REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route and status code",
+    ["method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds", "Time to serve an HTTP request",
+    ["method", "route"], buckets=LATENCY_BUCKETS,
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being served",
+    ["method", "route"],
+)
+POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["engine"],
+)
+# Time from checkout to checkin, not time spent waiting for a free connection
+POOL_HOLD_DURATION = Histogram(
+    "db_connection_hold_seconds", "How long each connection stayed checked out of the pool",
+    ["engine"], buckets=HOLD_BUCKETS,
+)
+
+UNMATCHED = "unmatched"
+
+def route_template(scope) -> str:
+    """The template of the route the router will pick for ``scope``.
+
+    Like the router, the first full match wins, else the first route that
+    matches all but the method (a 405).
+    """
+    partial = None
+    for route in scope["app"].router.routes:
+        match, _ = route.matches(scope)
+        if match is Match.FULL:
+            return getattr(route, "path", UNMATCHED)
+        if match is Match.PARTIAL and partial is None:
+            partial = getattr(route, "path", UNMATCHED)
+    return partial or UNMATCHED
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        template = route_template(scope)
+        in_progress = IN_PROGRESS.labels(method, template)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            LATENCY.labels(method, template).observe(time.perf_counter() - started)
+            REQUESTS.labels(method, template, str(status_code)).inc()
+
+_engines: Dict[str, Engine] = {}
+
+def instrument_engine(engine: Engine, name: str):
+    """Count pool checkouts and time how long each connection is held."""
+    _engines[name] = engine
+    checkouts = POOL_CHECKOUTS.labels(name)
+    duration = POOL_HOLD_DURATION.labels(name)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        connection_record.info["checked_out_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        started = connection_record.info.pop("checked_out_at", None)
+        if started is not None:
+            duration.observe(time.perf_counter() - started)
+
+# Pool methods read at scrape time; pools without them (e.g. NullPool) are skipped
+POOL_GAUGES = {
+    "size": "Configured pool size",
+    "checkedout": "Connections currently checked out",
+    "checkedin": "Idle connections in the pool",
+}
+HASHING_GAUGES = {
+    "password_hash_queue_depth": "bcrypt jobs queued or running",
+    "password_hash_queue_peak": "Highest bcrypt queue depth since start",
+    "password_hash_concurrency": "bcrypt worker threads",
+}
+
+class _StateCollector:
+    def collect(self):
+        for method, documentation in POOL_GAUGES.items():
+            gauge = GaugeMetricFamily(f"db_pool_{method}", documentation, labels=["engine"])
+            for name, engine in _engines.items():
+                read = getattr(engine.pool, method, None)
+                if read is not None:
+                    gauge.add_metric([name], read())
+            yield gauge
+
+        hashing = auth.hashing_stats()
+        for key, documentation in HASHING_GAUGES.items():
+            yield GaugeMetricFamily(key, documentation, value=hashing[key])
+
+        yield GaugeMetricFamily("events_subscribers", "Open /api/events streams", value=len(events.broker))
+
+REGISTRY.register(_StateCollector())
+
+def metrics_response(request: Request) -> Response:
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not secrets.compare_digest(token, METRICS_TOKEN):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(content=generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
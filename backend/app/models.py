@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Index, insert_sentinel
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.orm import backref
@@ -6,6 +6,10 @@ from datetime import datetime
 
 Base = declarative_base()
 
+# Lets SQLAlchemy batch INSERT ... RETURNING in parameter order on SQLite,
+# which has no other way to match returned ids to rows; always NULL
+SENTINEL_COLUMN = "insert_sentinel"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -33,17 +37,49 @@ class Task(Base):
     est_cost = Column(Integer, default=0)      # in currency units
     status = Column(String, default="Not Started")
     owner = Column(String, nullable=True)
+    
+    # Own value plus the sum over all subtasks, maintained by app/rollups.py
+    rollup_total_job = Column(Integer, default=0, server_default="0")
+    rollup_completed = Column(Integer, default=0, server_default="0")
+    rollup_stuck = Column(Integer, default=0, server_default="0")
+    rollup_est_cost = Column(Integer, default=0, server_default="0")
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Foreign keys
     user_owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     parent_task_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
     
+    _sentinel = insert_sentinel(SENTINEL_COLUMN)
+    
     # Relationships
     user_owner = relationship("User", back_populates="tasks")
     # subtasks = relationship("Task", backref=relationship("parent", remote_side=[id])) 
     subtasks = relationship("Task", backref=backref("parent", remote_side=[id]))
+    
+    __table_args__ = (
+        # Top-level page (parent IS NULL ORDER BY id) and every child lookup
+        Index("ix_tasks_parent_task_id_id", "parent_task_id", "id"),
+        # Server-side filters in app/search.py
+        Index("ix_tasks_status", "status"),
+        Index("ix_tasks_owner", "owner"),
+        Index("ix_tasks_start_time", "start_time"),
+        Index("ix_tasks_due_time", "due_time"),
+    )
+
+class TaskClosure(Base):
+    __tablename__ = "task_closure"
+    
+    # Every (ancestor, descendant) pair of the task tree, each task paired
+    # with itself at depth 0; maintained by app/hierarchy.py
+    ancestor_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        # Ancestor chains, nearest first
+        Index("ix_task_closure_descendant_id_depth", "descendant_id", "depth"),
+    )
 
 class Manpower(Base):
     __tablename__ = "manpower"
@@ -55,10 +91,40 @@ class Manpower(Base):
     number_of_manpower = Column(Integer, default=1)  # Number of manpower
     perday_cost = Column(Integer, nullable=True)     # Optional cost per day
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
     
     # Foreign keys
     user_owner_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     
+    _sentinel = insert_sentinel(SENTINEL_COLUMN)
+    
     # Relationships
-    user_owner = relationship("User")
\ No newline at end of file
+    user_owner = relationship("User")
+    
+    __table_args__ = (
+        # Keyset pagination walks manpower in (date, id) order
+        Index("ix_manpower_date_id", "date", "id"),
+        # Analytics and filters by type or work over a date range
+        Index("ix_manpower_manpower_type_date", "manpower_type", "date"),
+        Index("ix_manpower_engaged_to_date", "engaged_to", "date"),
+    )
+
+class CollectionVersion(Base):
+    __tablename__ = "collection_versions"
+    
+    # Bumped in the same transaction as every write to the collection
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+class Deletion(Base):
+    __tablename__ = "deletions"
+    
+    # Tombstones for delta sync: which record left which collection, and when
+    id = Column(Integer, primary_key=True, index=True)
+    collection = Column(String, nullable=False)
+    record_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_deletions_collection_deleted_at", "collection", "deleted_at"),
+    )
\ No newline at end of file
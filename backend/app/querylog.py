@@ -0,0 +1,144 @@
+"""Per-request SQL statistics, slow query log and N+1 detection.
+
+Engine events time every statement and add it to the ``QueryStats`` of the
+request being served (a context variable, so it follows the request into
+the threadpool and through ``AsyncSession.run_sync``). ``QueryLogMiddleware``
+reports the totals in a ``Server-Timing`` header and warns when one
+statement shape - the SQL text with its bound parameters left out - runs
+more than ``N_PLUS_ONE_THRESHOLD`` times in a request.
+
+Tests can pin query counts with ``assert_query_count``::
+
+    with querylog.assert_query_count(2):
+        client.get("/api/tasks/", headers=headers)
+"""
+import logging
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "10"))
+SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() in ("1", "true", "yes")
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, seconds: float):
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.shapes[statement] += 1
+
+    def merge(self, other: "QueryStats"):
+        with self._lock:
+            self.count += other.count
+            self.seconds += other.seconds
+            self.shapes.update(other.shapes)
+
+    def repeated(self, threshold: int):
+        return [(statement, count) for statement, count in self.shapes.most_common() if count > threshold]
+
+    def describe(self) -> str:
+        return "\n".join(f"{count}x {statement}" for statement, count in self.shapes.most_common())
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+# Captures opened by assert_query_count/capture_queries; requests run on the
+# TestClient's event loop thread, outside the test's context
+_captures: List[QueryStats] = []
+_captures_lock = threading.Lock()
+
+def _one_line(statement: str, limit: int = 300) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + "..."
+
+def instrument_engine(engine: Engine):
+    # The start time rides on the execution context, so failed statements leave nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finish(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = _current.get()
+        if stats is not None:
+            stats.record(statement, elapsed)
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, _one_line(statement))
+
+def server_timing(stats: QueryStats) -> str:
+    return f'db;desc="{stats.count} queries";dur={stats.seconds * 1000:.1f}'
+
+class QueryLogMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and SERVER_TIMING:
+                # Streaming bodies may query later; the header covers the work up to here
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            for statement, count in stats.repeated(N_PLUS_ONE_THRESHOLD):
+                logger.warning(
+                    "Possible N+1 in %s %s: statement ran %d times: %s",
+                    scope["method"], scope["path"], count, _one_line(statement),
+                )
+            if _captures:
+                with _captures_lock:
+                    for capture in _captures:
+                        capture.merge(stats)
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Collect the statements run in this block, in requests or directly."""
+    captured = QueryStats()
+    token = _current.set(captured)
+    with _captures_lock:
+        _captures.append(captured)
+    try:
+        yield captured
+    finally:
+        with _captures_lock:
+            _captures.remove(captured)
+        _current.reset(token)
+
+@contextmanager
+def assert_query_count(expected: int) -> Iterator[QueryStats]:
+    with capture_queries() as captured:
+        yield captured
+    if captured.count != expected:
+        raise AssertionError(f"Expected {expected} queries, ran {captured.count}:\n{captured.describe()}")
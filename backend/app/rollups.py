@@ -0,0 +1,150 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Own column -> stored roll-up column (own value plus every descendant's)
+ROLLUP_FIELDS = {
+    "total_job": "rollup_total_job",
+    "completed": "rollup_completed",
+    "stuck": "rollup_stuck",
+    "est_cost": "rollup_est_cost",
+}
+
+def own_values(task: models.Task) -> Dict[str, int]:
+    return {field: getattr(task, field) or 0 for field in ROLLUP_FIELDS}
+
+def init_rollups(task: models.Task):
+    """Seed the roll-up columns of a task that has no subtasks yet."""
+    for field, value in own_values(task).items():
+        setattr(task, ROLLUP_FIELDS[field], value)
+
+def apply_delta(db: Session, task_ids: Iterable[int], delta: Dict[str, int]):
+    """Add ``delta`` (keyed by own column) to the roll-ups of ``task_ids``."""
+    task_ids = list(task_ids)
+    values = {
+        ROLLUP_FIELDS[field]: getattr(models.Task, ROLLUP_FIELDS[field]) + amount
+        for field, amount in delta.items()
+        if amount
+    }
+    if not task_ids or not values:
+        return
+    db.execute(
+        update(models.Task)
+        .where(models.Task.id.in_(task_ids))
+        .values(values)
+        .execution_options(synchronize_session=False)
+    )
+
+def _sum_subtrees(roots, children, totals, expand=None):
+    """Add each child's totals into its parent, bottom-up from ``roots``.
+
+    Only ids in ``expand`` are descended into (all when None); the rest keep
+    the totals they already have. Iterative so deep trees don't hit the
+    recursion limit.
+    """
+    for root in roots:
+        stack = [(root, False)]
+        while stack:
+            task_id, visited = stack.pop()
+            if visited:
+                for child_id in children[task_id]:
+                    for i, value in enumerate(totals[child_id]):
+                        totals[task_id][i] += value
+                continue
+            stack.append((task_id, True))
+            stack.extend(
+                (child_id, False) for child_id in children[task_id]
+                if expand is None or child_id in expand
+            )
+
+def _write_totals(db: Session, totals: Dict[int, List[int]]):
+    if not totals:
+        return
+    columns = list(ROLLUP_FIELDS.values())
+    db.execute(
+        update(models.Task),
+        [{"id": task_id, **dict(zip(columns, values))} for task_id, values in totals.items()],
+    )
+
+def refresh_chains(db: Session, task_ids: Iterable[int]):
+    """Recompute roll-ups of ``task_ids`` and all of their ancestors exactly.
+
+    Used after set-based writes, where several changes may share ancestors.
+    Costs three statements however many tasks changed.
+    """
+    seeds = list(set(task_ids))
+    if not seeds:
+        return
+
+    chain = (
+        select(models.Task.id, models.Task.parent_task_id)
+        .where(models.Task.id.in_(seeds))
+        .cte("ancestors", recursive=True)
+    )
+    chain = chain.union(
+        select(models.Task.id, models.Task.parent_task_id)
+        .join(chain, models.Task.id == chain.c.parent_task_id)
+    )
+    affected = set(db.execute(select(chain.c.id)).scalars())
+    if not affected:
+        return
+
+    # The affected tasks plus their direct children, whose roll-ups feed them
+    own_columns = [getattr(models.Task, field) for field in ROLLUP_FIELDS]
+    rollup_columns = [getattr(models.Task, column) for column in ROLLUP_FIELDS.values()]
+    rows = db.query(
+        models.Task.id, models.Task.parent_task_id, *own_columns, *rollup_columns
+    ).filter(
+        or_(models.Task.id.in_(affected), models.Task.parent_task_id.in_(affected))
+    ).all()
+
+    width = len(ROLLUP_FIELDS)
+    totals = {}
+    children: Dict[int, List[int]] = defaultdict(list)
+    roots = []
+    for row in rows:
+        task_id, parent_id = row[0], row[1]
+        if task_id in affected:
+            totals[task_id] = [value or 0 for value in row[2:2 + width]]
+            if parent_id not in affected:
+                roots.append(task_id)
+        else:
+            totals[task_id] = [value or 0 for value in row[2 + width:]]
+        if parent_id in affected:
+            children[parent_id].append(task_id)
+
+    _sum_subtrees(roots, children, totals, expand=affected)
+    _write_totals(db, {task_id: totals[task_id] for task_id in affected if task_id in totals})
+
+def diff(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {field: after[field] - before[field] for field in ROLLUP_FIELDS}
+
+def negate(values: Dict[str, int]) -> Dict[str, int]:
+    return {field: -value for field, value in values.items()}
+
+def rollup_values(task: models.Task) -> Dict[str, int]:
+    return {field: getattr(task, column) or 0 for field, column in ROLLUP_FIELDS.items()}
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute every task's roll-ups from scratch. Returns the row count."""
+    columns = [getattr(models.Task, field) for field in ROLLUP_FIELDS]
+    rows = db.query(models.Task.id, models.Task.parent_task_id, *columns).all()
+
+    totals = {row[0]: [value or 0 for value in row[2:]] for row in rows}
+    children: Dict[int, List[int]] = defaultdict(list)
+    roots = []
+    for row in rows:
+        task_id, parent_id = row[0], row[1]
+        if parent_id is None or parent_id not in totals:
+            roots.append(task_id)
+        else:
+            children[parent_id].append(task_id)
+
+    _sum_subtrees(roots, children, totals)
+    _write_totals(db, totals)
+    db.commit()
+    return len(totals)
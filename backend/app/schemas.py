@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List
 
 class UserBase(BaseModel):
@@ -46,11 +46,33 @@ class TaskUpdate(BaseModel):
     est_cost: Optional[int] = None
     status: Optional[str] = None
     owner: Optional[str] = None
+    parent_task_id: Optional[int] = None  # Moves the whole subtree; null makes it top-level
+
+class TaskMove(BaseModel):
+    parent_task_id: Optional[int] = None  # null makes the task top-level
+
+class SubtreeChange(BaseModel):
+    message: str
+    task_id: int
+    tasks: int  # The task and its descendants, all deleted or moved together
+    dry_run: bool = False
+
+class TaskBatchUpdate(TaskUpdate):
+    id: int
+
+class TaskBatch(BaseModel):
+    create: List[TaskCreate] = []
+    update: List[TaskBatchUpdate] = []
+    delete: List[int] = []
 
 class Task(TaskBase):
     id: int
     owner: Optional[str] = None
     parent_task_id: Optional[int] = None
+    rollup_total_job: int = 0
+    rollup_completed: int = 0
+    rollup_stuck: int = 0
+    rollup_est_cost: int = 0
     created_at: datetime
     updated_at: datetime
     subtasks: List['Task'] = []
@@ -61,6 +83,30 @@ class Task(TaskBase):
 # Update forward references
 Task.model_rebuild()
 
+class TaskRecord(TaskBase):
+    """A single task row without nested subtasks."""
+    id: int
+    parent_task_id: Optional[int] = None
+    rollup_total_job: int = 0
+    rollup_completed: int = 0
+    rollup_stuck: int = 0
+    rollup_est_cost: int = 0
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class Timeline(BaseModel):
+    tasks: List[TaskRecord]      # Overlapping the window, by start time
+    ancestors: List[TaskRecord]  # Parents of those tasks outside the window
+
+class TaskSummary(BaseModel):
+    total_job: int
+    completed: int
+    stuck: int
+    est_cost: int
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -85,10 +131,53 @@ class ManpowerUpdate(BaseModel):
     number_of_manpower: Optional[int] = None
     perday_cost: Optional[int] = None
 
+class ManpowerBatchUpdate(ManpowerUpdate):
+    id: int
+
+class ManpowerBatch(BaseModel):
+    create: List[ManpowerCreate] = []
+    update: List[ManpowerBatchUpdate] = []
+    delete: List[int] = []
+
 class Manpower(ManpowerBase):
     id: int
     created_at: datetime
     updated_at: datetime
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ManpowerSummary(BaseModel):
+    period: date  # First day of the day/week/month bucket
+    manpower_type: str
+    engaged_to: str
+    records: int
+    head_count: int
+    total_cost: int
+
+class BatchItemResult(BaseModel):
+    operation: str  # create, update or delete
+    index: int      # Position of the item within its operation list
+    id: Optional[int] = None
+    ok: bool = True
+    detail: Optional[str] = None
+
+class BatchResult(BaseModel):
+    results: List[BatchItemResult]
+
+class ImportRowError(BaseModel):
+    row: int  # Sheet row number, header is row 1
+    detail: str
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []  # First errors only, capped
+
+class SyncChanges(BaseModel):
+    # Apply the deletions first: SQLite may reuse the id of a deleted row
+    tasks: List[TaskRecord]
+    manpower: List[Manpower]
+    deleted_tasks: List[int]
+    deleted_manpower: List[int]
+    token: str  # Pass back as ?since= on the next sync
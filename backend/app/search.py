@@ -0,0 +1,135 @@
+"""Server-side filtering and full-text search over tasks.
+
+Text search is backed by a real index, created in migration 0003:
+
+* SQLite: an external-content FTS5 table, ``tasks_fts``, over ``name`` and
+  ``description``. Triggers on ``tasks`` keep it in sync with every write,
+  bulk statements included.
+* Postgres: a GIN index on ``DOCUMENT_SQL``, the tsvector of the same two
+  columns. Postgres maintains it itself.
+
+Every word of the query must match, the last one as a prefix. Ranked
+results page by ``(score, id)`` with a cursor; filtered lists without text
+page by ``id``.
+"""
+import re
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, column, func, literal_column, not_, or_, select, table, tuple_
+from sqlalchemy.orm import Query, Session
+
+from . import models, pagination
+
+FTS_TABLE = "tasks_fts"
+SEARCH_INDEX = "ix_tasks_search"
+SEARCH_CONFIG = "english"
+# Must match the indexed expression exactly for Postgres to use the index
+DOCUMENT_SQL = (
+    f"to_tsvector('{SEARCH_CONFIG}', coalesce(tasks.name, '') || ' ' || coalesce(tasks.description, ''))"
+)
+# Hand-written schema objects that Alembic autogenerate must leave alone
+UNMANAGED_OBJECTS = (FTS_TABLE, SEARCH_INDEX)
+
+def search_terms(text: Optional[str]) -> List[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+def _match_sqlite(terms: Sequence[str]):
+    fts = table(FTS_TABLE, column("rowid"))
+    # Quoted so user text can't use FTS5 operators; '*' makes the last word a prefix
+    expression = " ".join(f'"{term}"' for term in terms) + "*"
+    return (
+        select(
+            fts.c.rowid.label("id"),
+            func.bm25(literal_column(FTS_TABLE)).label("score"),
+        )
+        .select_from(fts)
+        .where(literal_column(FTS_TABLE).op("MATCH")(expression))
+        .subquery("matches")
+    )
+
+def _match_postgres(terms: Sequence[str]):
+    document = literal_column(DOCUMENT_SQL)
+    query = func.to_tsquery(
+        literal_column(f"'{SEARCH_CONFIG}'"),
+        " & ".join(terms[:-1] + [terms[-1] + ":*"]),
+    )
+    return (
+        select(
+            models.Task.id.label("id"),
+            # Negated so a lower score is a better match, as with bm25
+            (-func.ts_rank(document, query)).label("score"),
+        )
+        .where(document.op("@@")(query))
+        .subquery("matches")
+    )
+
+def apply_filters(
+    query: Query,
+    status: Optional[Sequence[str]] = None,
+    owner: Optional[str] = None,
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    due_from: Optional[datetime] = None,
+    due_to: Optional[datetime] = None,
+    overdue: Optional[bool] = None,
+    stuck: Optional[bool] = None,
+    now: Optional[datetime] = None,
+) -> Query:
+    task = models.Task
+    if status:
+        query = query.filter(task.status.in_(status))
+    if owner is not None:
+        query = query.filter(task.owner == owner)
+    if start_from is not None:
+        query = query.filter(task.start_time >= start_from)
+    if start_to is not None:
+        query = query.filter(task.start_time <= start_to)
+    if due_from is not None:
+        query = query.filter(task.due_time >= due_from)
+    if due_to is not None:
+        query = query.filter(task.due_time <= due_to)
+    if overdue is not None:
+        condition = and_(task.due_time < (now or datetime.utcnow()), task.status != "Completed")
+        query = query.filter(condition if overdue else not_(condition))
+    if stuck is not None:
+        condition = or_(task.stuck > 0, task.status == "Stuck")
+        query = query.filter(condition if stuck else not_(condition))
+    return query
+
+def search_tasks(
+    db: Session,
+    text: Optional[str],
+    limit: int,
+    cursor: Optional[str] = None,
+    **filters,
+) -> Tuple[List[models.Task], Optional[str]]:
+    """Return one page of matching tasks and the cursor for the next page."""
+    terms = search_terms(text)
+    if not terms:
+        query = apply_filters(db.query(models.Task), **filters).order_by(models.Task.id)
+        if cursor is not None:
+            (last_id,) = pagination.decode_cursor(cursor, 1)
+            query = query.filter(models.Task.id > pagination.decode_int(last_id))
+        tasks = query.limit(limit).all()
+        next_cursor = pagination.encode_cursor(tasks[-1].id) if len(tasks) == limit else None
+        return tasks, next_cursor
+
+    dialect = db.get_bind().dialect.name
+    matches = _match_postgres(terms) if dialect == "postgresql" else _match_sqlite(terms)
+    query = apply_filters(
+        db.query(models.Task, matches.c.score).join(matches, matches.c.id == models.Task.id),
+        **filters,
+    ).order_by(matches.c.score, models.Task.id)
+    if cursor is not None:
+        last_score, last_id = pagination.decode_cursor(cursor, 2)
+        query = query.filter(
+            tuple_(matches.c.score, models.Task.id) >
+            tuple_(pagination.decode_float(last_score), pagination.decode_int(last_id))
+        )
+    rows = query.limit(limit).all()
+    next_cursor = None
+    if len(rows) == limit:
+        last_task, last_score = rows[-1]
+        next_cursor = pagination.encode_cursor(last_score, last_task.id)
+    return [task for task, _ in rows], next_cursor
@@ -0,0 +1,53 @@
+"""Single-pass JSON encoding for list responses.
+
+Rows read from our own tables are already valid, so list endpoints copy the
+response fields into plain dicts and encode them straight to bytes, instead
+of validating every node against the ``response_model`` and then walking it
+again with ``jsonable_encoder``. orjson is used when installed; the standard
+library encoder is the fallback and produces the same output.
+"""
+import json
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from . import schemas
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(
+        payload,
+        default=_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+def fields_of(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+MANPOWER_FIELDS = fields_of(schemas.Manpower)
+TASK_RECORD_FIELDS = fields_of(schemas.TaskRecord)
+MANPOWER_SUMMARY_FIELDS = fields_of(schemas.ManpowerSummary)
+
+def rows_to_dicts(rows: Iterable, fields: Sequence[str]) -> List[dict]:
+    """Copy ``fields`` off ORM objects or named rows, skipping validation."""
+    return [{field: getattr(row, field) for field in fields} for row in rows]
+
+def json_response(payload, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(content=dumps(payload), media_type="application/json", headers=headers)
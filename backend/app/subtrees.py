@@ -0,0 +1,79 @@
+"""Whole-branch task operations.
+
+Deleting or moving a task takes all of its subtasks with it. The branch is
+read from the closure table (app/hierarchy.py) and changed with a few
+set-based statements, however large it is; no descendant is loaded into the
+session. Both operations can run as a dry run, which only reports how many
+tasks they would touch.
+"""
+from typing import Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from . import models, hierarchy, rollups, sync
+
+Closure = models.TaskClosure
+
+def subtree_size(db: Session, task_id: int) -> int:
+    return db.execute(
+        select(func.count()).select_from(Closure).where(Closure.ancestor_id == task_id)
+    ).scalar()
+
+def delete_subtrees(db: Session, root_ids: Iterable[int]) -> List[int]:
+    """Delete the given tasks with all their descendants; returns the deleted ids.
+
+    Roll-ups of the surviving ancestors are left to the caller.
+    """
+    subtree = select(Closure.descendant_id).where(Closure.ancestor_id.in_(list(root_ids)))
+    task_ids = list(db.execute(subtree.distinct()).scalars())
+    if not task_ids:
+        return []
+    # Tasks first: the closure rows still describe the branch. Postgres
+    # cascades them; the second statement clears them everywhere else
+    db.execute(
+        delete(models.Task)
+        .where(models.Task.id.in_(subtree))
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        delete(Closure)
+        .where(Closure.descendant_id.in_(subtree))
+        .execution_options(synchronize_session=False)
+    )
+    sync.log_deletions(db, "tasks", task_ids)
+    return task_ids
+
+def delete_subtree(db: Session, task: models.Task, dry_run: bool = False) -> int:
+    """Delete ``task`` and its descendants; returns how many tasks that is.
+
+    Load ``task`` with ``with_for_update()``: its roll-ups are subtracted
+    from the ancestors and must not change before the commit.
+    """
+    if dry_run:
+        return subtree_size(db, task.id)
+    # The whole branch drops out of the ancestors' totals
+    ancestors = hierarchy.ancestor_ids(db, task.parent_task_id)
+    rollups.apply_delta(db, ancestors, rollups.negate(rollups.rollup_values(task)))
+    return len(delete_subtrees(db, [task.id]))
+
+def move_subtree(db: Session, task: models.Task, parent_id: Optional[int], dry_run: bool = False) -> int:
+    """Re-hang ``task`` and its descendants under ``parent_id`` (None for top level).
+
+    Returns how many tasks move. Raises ValueError if the parent is missing or
+    inside the branch itself.
+    """
+    detail = hierarchy.invalid_parent(db, task.id, parent_id)
+    if detail is not None:
+        raise ValueError(detail)
+    count = subtree_size(db, task.id)
+    old_parent_id = task.parent_task_id
+    if dry_run or parent_id == old_parent_id:
+        return count
+
+    task.parent_task_id = parent_id
+    db.flush()
+    hierarchy.move(db, task.id, parent_id)
+    # Exact totals for the task (its own values may have changed too) and both chains
+    rollups.refresh_chains(db, [task.id] + ([old_parent_id] if old_parent_id is not None else []))
+    return count
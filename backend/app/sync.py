@@ -0,0 +1,55 @@
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import models, pagination
+
+# Rows committed shortly after a sync may carry an earlier updated_at, so the
+# next token reaches back this far; clients apply repeats idempotently
+SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "30"))
+
+def log_deletions(db: Session, collection: str, record_ids: Iterable[int]):
+    """Record tombstones for deleted rows, in the caller's transaction."""
+    rows = [{"collection": collection, "record_id": record_id} for record_id in record_ids]
+    if rows:
+        db.execute(insert(models.Deletion), rows)
+
+def decode_token(token: Optional[str]) -> Optional[datetime]:
+    if token is None:
+        return None
+    (since,) = pagination.decode_cursor(token, 1)
+    return pagination.decode_datetime(since)
+
+def _changed(db: Session, model, since: Optional[datetime]):
+    query = db.query(model).order_by(model.updated_at, model.id)
+    if since is not None:
+        query = query.filter(model.updated_at > since)
+    return query.all()
+
+def _deleted(db: Session, collection: str, since: Optional[datetime]):
+    if since is None:
+        # A first sync is a full snapshot, so there is nothing to remove
+        return []
+    return list(db.execute(
+        select(models.Deletion.record_id)
+        .where(models.Deletion.collection == collection, models.Deletion.deleted_at > since)
+        .order_by(models.Deletion.deleted_at)
+    ).scalars().unique())
+
+def changes_since(db: Session, token: Optional[str]) -> dict:
+    since = decode_token(token)
+    # Taken before reading so nothing written during the reads is skipped
+    next_since = datetime.utcnow() - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+    if since is not None and since > next_since:
+        next_since = since
+
+    return {
+        "tasks": _changed(db, models.Task, since),
+        "manpower": _changed(db, models.Manpower, since),
+        "deleted_tasks": _deleted(db, "tasks", since),
+        "deleted_manpower": _deleted(db, "manpower", since),
+        "token": pagination.encode_cursor(next_since),
+    }
@@ -0,0 +1,110 @@
+"""Tasks active in a date window, for the Gantt view.
+
+A task is active when ``[start_time, due_time]`` overlaps the window. Neither
+end alone bounds that search, so each dialect gets a real interval index,
+created in migration 0004:
+
+* SQLite: an R*Tree, ``tasks_window``, holding each task's span in days since
+  1970. Triggers on ``tasks`` keep it in sync. R*Tree stores 32-bit floats
+  rounded outwards, so its hits are re-checked against the exact columns.
+* Postgres: a GiST index on ``WINDOW_SQL``, the task's span as a ``tsrange``,
+  searched with ``&&``.
+
+Either way the cost follows the number of tasks in the window, not the
+table. Tasks whose due time is before their start are treated as spanning
+the two dates.
+"""
+from datetime import datetime, timezone
+from typing import List
+
+from sqlalchemy import and_, case, column, func, literal_column, select, table
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from . import models, serialization
+
+WINDOW_TABLE = "tasks_window"
+WINDOW_INDEX = "ix_tasks_window"
+# Must match the indexed expression exactly for Postgres to use the index
+WINDOW_SQL = (
+    "tsrange(least(tasks.start_time, tasks.due_time), greatest(tasks.start_time, tasks.due_time), '[]')"
+)
+# Hand-written schema objects that Alembic autogenerate must leave alone
+UNMANAGED_OBJECTS = (WINDOW_TABLE, WINDOW_INDEX)
+
+# Plain rows rather than ORM objects: a wide window can hold thousands of tasks
+RECORD_COLUMNS = [getattr(models.Task, field) for field in serialization.TASK_RECORD_FIELDS]
+
+def _naive_utc(value: datetime) -> datetime:
+    # Task times are stored as naive UTC
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _days(value: datetime) -> float:
+    return (value - datetime(1970, 1, 1)).total_seconds() / 86400
+
+def _span():
+    task = models.Task
+    return (
+        case((task.start_time <= task.due_time, task.start_time), else_=task.due_time),
+        case((task.start_time <= task.due_time, task.due_time), else_=task.start_time),
+    )
+
+def _candidates_sqlite(start: datetime, end: datetime):
+    window = table(WINDOW_TABLE, column("id"), column("start_day"), column("due_day"))
+    # Widened a little so R*Tree's float rounding can't drop a boundary task
+    return (
+        select(window.c.id)
+        .where(window.c.start_day <= _days(end) + 1, window.c.due_day >= _days(start) - 1)
+        .subquery("candidates")
+    )
+
+def _candidates_postgres(start: datetime, end: datetime):
+    window = func.tsrange(start, end, literal_column("'[]'"))
+    return (
+        select(models.Task.id)
+        .where(literal_column(WINDOW_SQL).op("&&")(window))
+        .subquery("candidates")
+    )
+
+def _in_window(db: Session, start: datetime, end: datetime):
+    """Ids of the tasks overlapping ``[start, end]``, as a subquery."""
+    start, end = _naive_utc(start), _naive_utc(end)
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        candidates = _candidates_postgres(start, end)
+    else:
+        candidates = _candidates_sqlite(start, end)
+    first, last = _span()
+    return (
+        select(models.Task.id)
+        .join(candidates, candidates.c.id == models.Task.id)
+        .where(and_(first <= end, last >= start))
+        .subquery("in_window")
+    )
+
+def tasks_in_window(db: Session, start: datetime, end: datetime) -> List[Row]:
+    """Tasks overlapping ``[start, end]``, ordered by start time."""
+    window = _in_window(db, start, end)
+    return (
+        db.query(*RECORD_COLUMNS)
+        .join(window, window.c.id == models.Task.id)
+        .order_by(models.Task.start_time, models.Task.id)
+        .all()
+    )
+
+def ancestors_outside_window(db: Session, start: datetime, end: datetime) -> List[Row]:
+    """Every ancestor of the tasks in the window that is not itself in it."""
+    window = _in_window(db, start, end)
+    ancestors = (
+        select(models.TaskClosure.ancestor_id)
+        .join(window, window.c.id == models.TaskClosure.descendant_id)
+        .where(models.TaskClosure.depth > 0)
+    )
+    return (
+        db.query(*RECORD_COLUMNS)
+        .filter(models.Task.id.in_(ancestors), models.Task.id.not_in(select(window.c.id)))
+        .order_by(models.Task.id)
+        .all()
+    )
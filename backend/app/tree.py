@@ -0,0 +1,106 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Columns copied into each node of the task tree response
+TASK_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "start_time",
+    "due_time",
+    "total_job",
+    "completed",
+    "stuck",
+    "est_duration",
+    "est_cost",
+    "status",
+    "owner",
+    "parent_task_id",
+    "rollup_total_job",
+    "rollup_completed",
+    "rollup_stuck",
+    "rollup_est_cost",
+    "created_at",
+    "updated_at",
+)
+
+def select_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """Parse a ``?fields=a,b`` projection; ``id`` is always included."""
+    if not fields:
+        return TASK_FIELDS
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in TASK_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    return tuple(dict.fromkeys(["id"] + requested))
+
+def task_columns(fields: Sequence[str] = TASK_FIELDS) -> list:
+    """Columns to select for ``fields``, plus the two that link the tree."""
+    names = dict.fromkeys(("id", "parent_task_id", *fields))
+    return [getattr(models.Task, name) for name in names]
+
+def task_to_dict(task, fields: Sequence[str] = TASK_FIELDS) -> dict:
+    task_dict = {field: getattr(task, field) for field in fields}
+    task_dict["subtasks"] = []
+    return task_dict
+
+def load_descendants(db: Session, root_ids: Sequence[int], fields: Sequence[str] = TASK_FIELDS) -> List[Row]:
+    """Fetch every descendant of the given tasks with one closure-table join.
+
+    Only the columns for ``fields`` are read, as plain rows.
+    """
+    if not root_ids:
+        return []
+
+    subtree = (
+        select(models.TaskClosure.descendant_id)
+        .where(models.TaskClosure.ancestor_id.in_(root_ids), models.TaskClosure.depth > 0)
+    )
+    return (
+        db.query(*task_columns(fields))
+        .filter(models.Task.id.in_(subtree))
+        .order_by(models.Task.id)
+        .all()
+    )
+
+def build_task_forest(db: Session, roots: Sequence, fields: Sequence[str] = TASK_FIELDS) -> List[dict]:
+    """Build nested task dicts for ``roots`` and all of their descendants.
+
+    ``roots`` are tasks or rows with at least ``task_columns(fields)``.
+    Costs one query regardless of the size or depth of the trees.
+    """
+    nodes: Dict[int, dict] = {task.id: task_to_dict(task, fields) for task in roots}
+    children: Dict[int, List[dict]] = defaultdict(list)
+
+    for task in load_descendants(db, list(nodes), fields):
+        if task.id in nodes:
+            continue
+        node = task_to_dict(task, fields)
+        nodes[task.id] = node
+        children[task.parent_task_id].append(node)
+
+    for parent_id, subtasks in children.items():
+        nodes[parent_id]["subtasks"] = subtasks
+
+    return [nodes[task.id] for task in roots]
+
+def flatten_task_forest(db: Session, roots: Sequence, fields: Sequence[str] = TASK_FIELDS) -> List[dict]:
+    """``roots`` and all of their descendants as flat dicts linked by ``parent_task_id``.
+
+    Roots come first, in the given order, then their descendants by id.
+    Skips the nesting pass and the ``subtasks`` lists altogether.
+    """
+    fields = tuple(dict.fromkeys((*fields, "parent_task_id")))
+    root_ids = {task.id for task in roots}
+    descendants = [task for task in load_descendants(db, list(root_ids), fields) if task.id not in root_ids]
+    return [{field: getattr(task, field) for field in fields} for task in [*roots, *descendants]]
@@ -0,0 +1,163 @@
+"""Per-collection version counters driving ETags and the response cache.
+
+Any write to ``tasks`` (or its closure table) or ``manpower`` - through the
+ORM unit of work or a bulk insert/update/delete statement - bumps the
+collection's row in ``collection_versions`` inside the same transaction.
+``app.database`` registers the listeners, so scripts writing through
+``SessionLocal`` bump versions just like the API. List endpoints derive
+their ETag from that version, answer ``If-None-Match`` with 304 and keep the
+encoded body of recent responses, so an unchanged poll skips both the
+queries and the JSON encoding.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from . import models, events, serialization
+from .cache import TTLCache
+
+COLLECTIONS = {
+    models.Task.__tablename__: "tasks",
+    # The tree shape of tasks: rebuilding it changes every tree response
+    models.TaskClosure.__tablename__: "tasks",
+    models.Manpower.__tablename__: "manpower",
+}
+
+# How long a worker may reuse a version it read (0 = read it on every
+# request). This worker's own writes show at once; other workers' writes may
+# take this long to show up in its list responses
+VERSION_CACHE_SECONDS = float(os.getenv("VERSION_CACHE_SECONDS", "1"))
+RESPONSE_CACHE_BYTES = int(os.getenv("RESPONSE_CACHE_MB", "32")) * 1024 * 1024
+
+# Encoded list responses keyed by ETag, bounded by their total body size;
+# a write changes every new ETag
+response_cache = TTLCache(
+    maxsize=RESPONSE_CACHE_BYTES, ttl=3600, getsizeof=lambda cached: len(cached[0])
+)
+
+_known: Dict[str, Tuple[float, int]] = {}
+_known_lock = threading.Lock()
+
+def _pending(session: Session) -> set:
+    return session.info.setdefault("changed_collections", set())
+
+def _track_flush(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        collection = COLLECTIONS.get(getattr(obj, "__tablename__", None))
+        if collection:
+            _pending(session).add(collection)
+
+def _track_bulk(orm_execute_state):
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    collection = COLLECTIONS.get(getattr(table, "name", None))
+    if collection:
+        _pending(orm_execute_state.session).add(collection)
+
+def _bump_versions(session):
+    session.flush()
+    changed = session.info.pop("changed_collections", None)
+    if not changed:
+        return
+    for collection in sorted(changed):
+        bumped = session.execute(
+            update(models.CollectionVersion)
+            .where(models.CollectionVersion.name == collection)
+            .values(version=models.CollectionVersion.version + 1)
+        )
+        if bumped.rowcount == 0:
+            session.execute(insert(models.CollectionVersion).values(name=collection, version=1))
+    session.info["committed_collections"] = changed
+
+def _forget_versions(session):
+    # Local writes are visible to this worker at once, whatever the TTL
+    changed = session.info.pop("committed_collections", ())
+    with _known_lock:
+        for collection in changed:
+            _known.pop(collection, None)
+    for collection in changed:
+        # Bodies of older versions can no longer be served
+        response_cache.discard_keys(lambda etag: etag.startswith(f'"{collection}-'))
+    for collection in sorted(changed):
+        events.broker.publish({"type": "change", "collection": collection})
+
+def _discard_pending(session):
+    session.info.pop("changed_collections", None)
+    session.info.pop("committed_collections", None)
+
+_LISTENERS = (
+    ("after_flush", _track_flush),
+    ("do_orm_execute", _track_bulk),
+    ("before_commit", _bump_versions),
+    ("after_commit", _forget_versions),
+    ("after_rollback", _discard_pending),
+)
+
+def register_listeners():
+    """Track writes on every Session; idempotent."""
+    for name, listener in _LISTENERS:
+        if not event.contains(Session, name, listener):
+            event.listen(Session, name, listener)
+
+def current(db: Session, collection: str) -> int:
+    if VERSION_CACHE_SECONDS > 0:
+        with _known_lock:
+            known = _known.get(collection)
+        if known and known[0] > time.monotonic():
+            return known[1]
+    version = db.execute(
+        select(models.CollectionVersion.version)
+        .where(models.CollectionVersion.name == collection)
+    ).scalar() or 0
+    if VERSION_CACHE_SECONDS > 0:
+        with _known_lock:
+            _known[collection] = (time.monotonic() + VERSION_CACHE_SECONDS, version)
+    return version
+
+def etag_for(collection: str, version: int, request: Request) -> str:
+    """ETag, and response cache key, of one representation of a collection.
+
+    A representation is the request path plus its query string: endpoints
+    sharing a collection (the tree, search, the timeline) and the pages and
+    filters of each get their own tag for the same version.
+    """
+    representation = f"{request.url.path}?{request.url.query}"
+    digest = hashlib.sha1(representation.encode()).hexdigest()[:12]
+    return f'"{collection}-{version}-{digest}"'
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def conditional_response(
+    request: Request,
+    db: Session,
+    collection: str,
+    build: Callable[[], Tuple[object, Dict[str, str]]],
+) -> Response:
+    """Serve a list endpoint through its collection's ETag and cache.
+
+    ``build`` returns the payload and any extra headers; it only runs when
+    this version, path and query have not been rendered recently.
+    """
+    etag = etag_for(collection, current(db, collection), request)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    cached = response_cache.get(etag)
+    if cached is None:
+        payload, extra_headers = build()
+        cached = (serialization.dumps(payload), extra_headers)
+        response_cache.set(etag, cached)
+    body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**extra_headers, **headers})
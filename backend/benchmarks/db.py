@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Database concurrency benchmark
+Runs a mixed read/write manpower workload from several threads against a
+scratch SQLite database, once with the driver defaults (rollback journal,
+synchronous=FULL) and once with the tuned pragmas, and prints throughput
+
+Usage: python -m benchmarks.db [--threads 16] [--seconds 10] [--write-ratio 0.2]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+MODES = {
+    "defaults": {"SQLITE_WAL": "false", "SQLITE_SYNCHRONOUS": "FULL", "SQLITE_BUSY_TIMEOUT_MS": "5000"},
+    "tuned": {},
+}
+SEED_ROWS = 5000
+PAGE_SIZE = 50
+
+def run_workload(threads: int, seconds: float, write_ratio: float) -> dict:
+    """Run in a child process whose DATABASE_URL and pragmas are already set."""
+    from sqlalchemy import insert
+    from sqlalchemy.exc import OperationalError
+
+    from app.database import SessionLocal, upgrade_schema
+    from app.models import Manpower
+
+    upgrade_schema()
+    start_date = datetime(2025, 1, 1)
+    db = SessionLocal()
+    db.execute(insert(Manpower), [
+        {
+            "date": start_date + timedelta(days=i % 365),
+            "manpower_type": random.choice(["Admin", "Engineer", "Labour"]),
+            "engaged_to": "General",
+            "number_of_manpower": random.randint(1, 60),
+        }
+        for i in range(SEED_ROWS)
+    ])
+    db.commit()
+    db.close()
+
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def worker():
+        rng = random.Random()
+        while time.monotonic() < deadline:
+            db = SessionLocal()
+            write = rng.random() < write_ratio
+            started = time.perf_counter()
+            try:
+                if write:
+                    db.add(Manpower(
+                        date=start_date + timedelta(days=rng.randrange(365)),
+                        manpower_type="Labour",
+                        engaged_to="Brick Work",
+                        number_of_manpower=rng.randint(1, 60),
+                    ))
+                    db.commit()
+                else:
+                    db.query(Manpower).order_by(Manpower.date, Manpower.id) \
+                        .offset(rng.randrange(SEED_ROWS - PAGE_SIZE)).limit(PAGE_SIZE).all()
+                outcome = "writes" if write else "reads"
+            except OperationalError:
+                db.rollback()
+                outcome = "errors"
+            finally:
+                db.close()
+            with lock:
+                counts[outcome] += 1
+                latencies.append(time.perf_counter() - started)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    latencies.sort()
+    return {
+        **counts,
+        "ops_per_second": (counts["reads"] + counts["writes"]) / seconds,
+        "p50_ms": latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SQLite defaults with the tuned pragmas")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_workload(args.threads, args.seconds, args.write_ratio)))
+        return
+
+    print(f"{args.threads} threads, {args.seconds:g}s, {args.write_ratio:.0%} writes")
+    print(f"{'mode':<10}{'ops/s':>10}{'reads':>10}{'writes':>10}{'errors':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for mode, overrides in MODES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            # Each mode gets a fresh process, since the pragmas are read at import
+            env = {**os.environ, **overrides, "DATABASE_URL": f"sqlite:///{directory}/benchmark.db"}
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.db", "--child",
+                 "--threads", str(args.threads),
+                 "--seconds", str(args.seconds),
+                 "--write-ratio", str(args.write_ratio)],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{mode:<10}{result['ops_per_second']:>10.0f}{result['reads']:>10}{result['writes']:>10}"
+            f"{result['errors']:>10}{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
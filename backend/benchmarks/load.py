@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Load runner
+Drives the API with concurrent virtual users (login, task tree pages,
+manpower pages and writes) and reports latency percentiles and throughput
+
+Without --url the app is served in-process on DATABASE_URL; seed it first
+with benchmarks.seed. --output saves the results, --compare prints the
+change against a saved run.
+
+Usage: python -m benchmarks.load [--url http://localhost:8000] [--users 20] [--seconds 30]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+
+OPERATIONS = ("login", "tree", "manpower", "create_manpower", "update_task")
+DEFAULT_MIX = "login=1,tree=8,manpower=8,create_manpower=2,update_task=2"
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def record(self, operation: str, seconds: float, ok: bool):
+        self.latencies[operation].append(seconds)
+        if not ok:
+            self.errors[operation] += 1
+
+    def summary(self, elapsed: float) -> dict:
+        operations = {}
+        for operation, latencies in sorted(self.latencies.items()):
+            operations[operation] = {
+                "count": len(latencies),
+                "errors": self.errors[operation],
+                **{f"p{p}_ms": percentile(latencies, p) * 1000 for p in (50, 95, 99)},
+            }
+        everything = [latency for latencies in self.latencies.values() for latency in latencies]
+        return {
+            "seconds": elapsed,
+            "requests": len(everything),
+            "errors": sum(self.errors.values()),
+            "requests_per_second": len(everything) / elapsed,
+            "p50_ms": percentile(everything, 50) * 1000,
+            "p95_ms": percentile(everything, 95) * 1000,
+            "p99_ms": percentile(everything, 99) * 1000,
+            "operations": operations,
+        }
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(p / 100 * len(ordered)) - 1, 0)]
+
+def parse_mix(mix: str) -> Dict[str, int]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = int(weight or 1)
+    unknown = set(weights) - set(OPERATIONS)
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return weights
+
+def collect_ids(nodes: List[dict], ids: List[int]):
+    for node in nodes:
+        ids.append(node["id"])
+        collect_ids(node.get("subtasks", []), ids)
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, stats: Stats, args, task_ids: List[int]):
+        self.client = client
+        self.stats = stats
+        self.args = args
+        self.task_ids = task_ids
+        self.rng = random.Random()
+        self.headers = {}
+        self.cursors = {"tree": None, "manpower": None}
+
+    async def request(self, operation: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.stats.record(operation, time.perf_counter() - started, ok)
+        return response if ok else None
+
+    async def login(self):
+        response = await self.request(
+            "login", "POST", "/api/token",
+            data={"username": self.args.user, "password": self.args.password},
+        )
+        if response is not None:
+            self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def page(self, operation: str, url: str, limit: int):
+        params = {"limit": limit}
+        if self.cursors[operation]:
+            params["cursor"] = self.cursors[operation]
+        response = await self.request(operation, "GET", url, params=params)
+        # Walk forward through the pages, starting over after the last one
+        self.cursors[operation] = response.headers.get("x-next-cursor") if response is not None else None
+        return response
+
+    async def tree(self):
+        await self.page("tree", "/api/tasks/", self.args.tree_limit)
+
+    async def manpower(self):
+        await self.page("manpower", "/api/manpower/", self.args.manpower_limit)
+
+    async def create_manpower(self):
+        date = datetime(2021, 1, 1) + timedelta(days=self.rng.randrange(5 * 365))
+        await self.request("create_manpower", "POST", "/api/manpower/", json={
+            "date": date.isoformat(),
+            "manpower_type": "Labour",
+            "engaged_to": "Brick Work",
+            "number_of_manpower": self.rng.randint(5, 60),
+        })
+
+    async def update_task(self):
+        if not self.task_ids:
+            return
+        task_id = self.rng.choice(self.task_ids)
+        await self.request("update_task", "PUT", f"/api/tasks/{task_id}", json={
+            "completed": self.rng.randint(0, 5),
+        })
+
+    async def run(self, weights: Dict[str, int], deadline: float):
+        await self.login()
+        names, counts = list(weights), list(weights.values())
+        while time.monotonic() < deadline:
+            operation = self.rng.choices(names, counts)[0]
+            await getattr(self, operation)()
+
+def make_client(url) -> httpx.AsyncClient:
+    timeout = httpx.Timeout(60.0)
+    limits = httpx.Limits(max_connections=None)
+    if url:
+        return httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits)
+    from app.main import app
+
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=timeout
+    )
+
+async def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    stats = Stats()
+    async with make_client(args.url) as client:
+        # Updates target tasks from the first tree page, fetched untimed
+        setup = VirtualUser(client, Stats(), args, [])
+        await setup.login()
+        if not setup.headers:
+            raise SystemExit(f"Cannot log in as {args.user}; run benchmarks.seed first")
+        response = await client.get("/api/tasks/", params={"limit": args.tree_limit}, headers=setup.headers)
+        task_ids: List[int] = []
+        collect_ids(response.json(), task_ids)
+
+        started = time.monotonic()
+        deadline = started + args.seconds
+        await asyncio.gather(*(
+            VirtualUser(client, stats, args, task_ids).run(weights, deadline)
+            for _ in range(args.users)
+        ))
+        return stats.summary(time.monotonic() - started)
+
+def print_summary(summary: dict, baseline: dict = None):
+    print(f"{summary['requests']} requests in {summary['seconds']:.1f}s, "
+          f"{summary['requests_per_second']:.1f} req/s, {summary['errors']} errors")
+    header = f"{'operation':<18}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p95 vs base':>13}"
+    print(header)
+    rows = list(summary["operations"].items()) + [("all", summary)]
+    for operation, result in rows:
+        count = result.get("count", summary["requests"])
+        line = (f"{operation:<18}{count:>8}{result['errors']:>8}"
+                f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+        if baseline:
+            before = baseline if operation == "all" else baseline["operations"].get(operation)
+            if before and before["p95_ms"]:
+                line += f"{(result['p95_ms'] / before['p95_ms'] - 1) * 100:>+12.0f}%"
+        print(line)
+    if baseline:
+        change = (summary["requests_per_second"] / baseline["requests_per_second"] - 1) * 100
+        print(f"throughput vs base: {change:+.0f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a scripted load against the API")
+    parser.add_argument("--url", help="base URL of a running server (default: in-process)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation weights")
+    parser.add_argument("--tree-limit", type=int, default=10, help="top-level tasks per tree page")
+    parser.add_argument("--manpower-limit", type=int, default=100)
+    parser.add_argument("--user", default="bench")
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_summary(summary, baseline)
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(summary, file, indent=2)
+
+if __name__ == "__main__":
+    main()
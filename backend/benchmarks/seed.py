@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator
+Bulk-loads a configurable volume of tasks, arranged in deep trees, and
+daily manpower records into DATABASE_URL for benchmarking
+
+Usage: python -m benchmarks.seed [--tasks 100000] [--fanout 5] [--depth 6] [--years 5] [--reset]
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import delete, insert
+
+from app import models
+from app.auth import get_password_hash
+from app.batch import bulk_insert
+from app.database import SessionLocal, upgrade_schema
+from app.hierarchy import rebuild
+from app.rollups import rebuild_rollups
+
+CHUNK_SIZE = 5000
+START_DATE = datetime(2021, 1, 1)
+
+STATUSES = ["Not Started", "In Progress", "Completed", "Stuck"]
+OWNERS = ["Site Engineer", "Procurement Team", "Site Supervisor", "Electrical Engineer", "Plumbing Engineer"]
+WORKS = ["Brick Work", "Structure Work", "Plaster Work", "Electric Work", "Sanitary Work", "Painting"]
+CREWS = [
+    ("Admin", "General"),
+    ("Engineer", "General"),
+    ("Supervisor", "General"),
+] + [("Labour", work) for work in WORKS]
+
+def task_row(rng: random.Random, number: int, parent_id: Optional[int], days: int) -> dict:
+    start = START_DATE + timedelta(days=rng.randrange(days))
+    duration = rng.randint(1, 120)
+    total_job = rng.randint(1, 20)
+    completed = rng.randint(0, total_job)
+    return {
+        "name": f"{rng.choice(WORKS)} #{number}",
+        "description": "Synthetic benchmark task",
+        "start_time": start,
+        "due_time": start + timedelta(days=duration),
+        "total_job": total_job,
+        "completed": completed,
+        "stuck": rng.randint(0, total_job - completed),
+        "est_duration": duration,
+        "est_cost": rng.randint(10, 5000) * 1000,
+        "status": rng.choice(STATUSES),
+        "owner": rng.choice(OWNERS),
+        "parent_task_id": parent_id,
+    }
+
+def seed_tasks(db, rng: random.Random, count: int, fanout: int, depth: int, days: int) -> int:
+    """Insert ``count`` tasks level by level; each level is a batched RETURNING pass."""
+    per_root = sum(fanout ** level for level in range(depth))
+    parents: List[Optional[int]] = [None] * -(-count // per_root)
+    inserted = 0
+    for level in range(depth):
+        level_ids = []
+        children = 1 if level == 0 else fanout
+        pending = []
+        for parent_id in parents:
+            for _ in range(children):
+                if inserted + len(pending) >= count:
+                    break
+                pending.append(task_row(rng, inserted + len(pending) + 1, parent_id, days))
+            if len(pending) >= CHUNK_SIZE:
+                level_ids += bulk_insert(db, models.Task, pending)
+                inserted += len(pending)
+                pending = []
+        level_ids += bulk_insert(db, models.Task, pending)
+        inserted += len(pending)
+        parents = level_ids
+        if inserted >= count or not parents:
+            break
+    db.commit()
+    return inserted
+
+def seed_manpower(db, rng: random.Random, days: int) -> int:
+    inserted = 0
+    rows = []
+    for day in range(days):
+        date = START_DATE + timedelta(days=day)
+        for manpower_type, engaged_to in CREWS:
+            rows.append({
+                "date": date,
+                "manpower_type": manpower_type,
+                "engaged_to": engaged_to,
+                "number_of_manpower": rng.randint(1, 5) if engaged_to == "General" else rng.randint(5, 60),
+                "perday_cost": rng.choice([None, 500, 700, 900]),
+            })
+        if len(rows) >= CHUNK_SIZE:
+            db.execute(insert(models.Manpower), rows)
+            inserted += len(rows)
+            rows = []
+    if rows:
+        db.execute(insert(models.Manpower), rows)
+        inserted += len(rows)
+    db.commit()
+    return inserted
+
+def ensure_user(db, username: str, password: str):
+    if db.query(models.User).filter(models.User.username == username).first() is None:
+        db.add(models.User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password=get_password_hash(password),
+            is_admin=True,
+        ))
+        db.commit()
+
+def timed(label: str, load):
+    started = time.perf_counter()
+    count = load()
+    elapsed = time.perf_counter() - started
+    print(f"{label}: {count} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):.0f} rows/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic tasks and manpower")
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--fanout", type=int, default=5, help="subtasks per task")
+    parser.add_argument("--depth", type=int, default=6, help="levels per task tree")
+    parser.add_argument("--years", type=float, default=5, help="years of daily manpower")
+    parser.add_argument("--user", default="bench")
+    parser.add_argument("--password", default="bench")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--reset", action="store_true", help="delete existing tasks and manpower first")
+    args = parser.parse_args()
+
+    upgrade_schema()
+    rng = random.Random(args.seed)
+    days = max(int(args.years * 365), 1)
+    db = SessionLocal()
+    try:
+        if args.reset:
+            db.execute(delete(models.Manpower))
+            db.execute(delete(models.TaskClosure))
+            db.execute(delete(models.Task))
+            db.execute(delete(models.Deletion))
+            db.commit()
+        ensure_user(db, args.user, args.password)
+        timed("tasks", lambda: seed_tasks(db, rng, args.tasks, args.fanout, args.depth, days))
+        timed("roll-ups", lambda: rebuild_rollups(db))
+        timed("hierarchy", lambda: rebuild(db))
+        timed("manpower", lambda: seed_manpower(db, rng, days))
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Serialization microbenchmark
+Encodes a synthetic task tree the way FastAPI does for a response_model
+(validate, dump, json.dumps) and with the single-pass encoder used by the
+list endpoints, and prints the cost per task node
+
+Usage: python -m benchmarks.serialization [--roots 200] [--children 4] [--depth 3]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app import schemas, serialization
+from app.models import Task
+from app.tree import task_to_dict
+
+def make_forest(roots: int, children: int, depth: int):
+    start = datetime(2025, 7, 23)
+    next_id = 0
+    nodes = 0
+
+    def node(parent_id, level):
+        nonlocal next_id, nodes
+        next_id += 1
+        nodes += 1
+        task = Task(
+            id=next_id, name=f"Task {next_id}", description="Materials and labor",
+            start_time=start, due_time=start + timedelta(days=30),
+            total_job=18, completed=3, stuck=0, est_duration=30, est_cost=2309500,
+            status="In Progress", owner="Site Engineer", parent_task_id=parent_id,
+            rollup_total_job=18, rollup_completed=3, rollup_stuck=0, rollup_est_cost=2309500,
+            created_at=start, updated_at=start,
+        )
+        task_dict = task_to_dict(task)
+        if level < depth:
+            task_dict["subtasks"] = [node(task.id, level + 1) for _ in range(children)]
+        return task_dict
+
+    forest = [node(None, 1) for _ in range(roots)]
+    return forest, nodes
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization paths")
+    parser.add_argument("--roots", type=int, default=200)
+    parser.add_argument("--children", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    forest, nodes = make_forest(args.roots, args.children, args.depth)
+    adapter = TypeAdapter(List[schemas.Task])
+    orjson = serialization.orjson
+
+    def response_model():
+        # What FastAPI does with a returned list: validate, dump, json.dumps
+        validated = adapter.validate_python(forest)
+        return json.dumps(adapter.dump_python(validated, mode="json"), separators=(",", ":")).encode()
+
+    def model_dump_json():
+        return adapter.dump_json(adapter.validate_python(forest))
+
+    def single_pass_stdlib():
+        serialization.orjson = None
+        try:
+            return serialization.dumps(forest)
+        finally:
+            serialization.orjson = orjson
+
+    paths = {
+        "response_model + json.dumps": response_model,
+        "validate + model_dump_json": model_dump_json,
+        "single pass (json)": single_pass_stdlib,
+    }
+    if orjson is not None:
+        paths["single pass (orjson)"] = lambda: serialization.dumps(forest)
+
+    print(f"{nodes} task nodes, best of {args.repeat}")
+    print(f"{'path':<30}{'total ms':>10}{'us/node':>10}")
+    for name, encode in paths.items():
+        best = min(timeit.repeat(encode, number=1, repeat=args.repeat))
+        print(f"{name:<30}{best * 1000:>10.1f}{best * 1e6 / nodes:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Data import script
+Streams a CSV or xlsx file of tasks or manpower records into the database
+
+Usage: python import_data.py tasks|manpower FILE [--format csv|xlsx] [--sheet NAME]
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app.importer import FORMATS, detect_format, import_file
+
+def main():
+    parser = argparse.ArgumentParser(description="Import tasks or manpower from CSV/xlsx")
+    parser.add_argument("kind", choices=["tasks", "manpower"])
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--sheet", help="xlsx sheet to read (default: the first with any content)")
+    args = parser.parse_args()
+
+    file_format = args.format or detect_format(args.path)
+    if file_format is None:
+        parser.error("cannot tell the file format, pass --format")
+
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as file:
+            result = import_file(db, args.kind, file, file_format, sheet=args.sheet)
+        print(f"Imported {result.imported} {args.kind} rows, {result.failed} failed")
+        for error in result.errors:
+            print(f"  row {error.row}: {error.detail}")
+    except Exception as e:
+        print(f"Error importing {args.path}: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
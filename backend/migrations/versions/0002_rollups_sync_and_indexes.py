@@ -0,0 +1,83 @@
+"""task roll-ups, sync tables and query indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ROLLUP_FIELDS = ("total_job", "completed", "stuck", "est_cost")
+
+
+def upgrade() -> None:
+    for field in ROLLUP_FIELDS:
+        op.add_column("tasks", sa.Column(f"rollup_{field}", sa.Integer(), server_default="0", nullable=True))
+
+    # Backfill: each task's own value plus those of its whole subtree
+    sums = ", ".join(
+        f"rollup_{field} = (SELECT COALESCE(SUM(t.{field}), 0) FROM subtree s "
+        f"JOIN tasks t ON t.id = s.id WHERE s.root = tasks.id)"
+        for field in ROLLUP_FIELDS
+    )
+    op.execute(
+        "WITH RECURSIVE subtree(root, id) AS ("
+        " SELECT id, id FROM tasks"
+        " UNION SELECT subtree.root, tasks.id FROM tasks"
+        " JOIN subtree ON tasks.parent_task_id = subtree.id"
+        f") UPDATE tasks SET {sums}"
+    )
+
+    op.create_index("ix_tasks_parent_task_id_id", "tasks", ["parent_task_id", "id"], unique=False)
+    op.create_index("ix_tasks_updated_at", "tasks", ["updated_at"], unique=False)
+
+    op.create_index("ix_manpower_date_id", "manpower", ["date", "id"], unique=False)
+    op.create_index("ix_manpower_manpower_type_date", "manpower", ["manpower_type", "date"], unique=False)
+    op.create_index("ix_manpower_engaged_to_date", "manpower", ["engaged_to", "date"], unique=False)
+    op.create_index("ix_manpower_updated_at", "manpower", ["updated_at"], unique=False)
+
+    op.create_table(
+        "collection_versions",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+    op.create_table(
+        "deletions",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("collection", sa.String(), nullable=False),
+        sa.Column("record_id", sa.Integer(), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_deletions_id", "deletions", ["id"], unique=False)
+    op.create_index("ix_deletions_collection_deleted_at", "deletions", ["collection", "deleted_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_deletions_collection_deleted_at", table_name="deletions")
+    op.drop_index("ix_deletions_id", table_name="deletions")
+    op.drop_table("deletions")
+    op.drop_table("collection_versions")
+
+    op.drop_index("ix_manpower_updated_at", table_name="manpower")
+    op.drop_index("ix_manpower_engaged_to_date", table_name="manpower")
+    op.drop_index("ix_manpower_manpower_type_date", table_name="manpower")
+    op.drop_index("ix_manpower_date_id", table_name="manpower")
+
+    op.drop_index("ix_tasks_updated_at", table_name="tasks")
+    op.drop_index("ix_tasks_parent_task_id_id", table_name="tasks")
+    with op.batch_alter_table("tasks") as batch_op:
+        for field in reversed(ROLLUP_FIELDS):
+            batch_op.drop_column(f"rollup_{field}")
@@ -0,0 +1,74 @@
+"""task filter indexes and full-text search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FILTER_INDEXES = ("status", "owner", "start_time", "due_time")
+
+# External-content FTS5 table over tasks, kept in step by triggers. A batch
+# migration that recreates tasks drops the triggers and must add them back
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE tasks_fts USING fts5("
+    "name, description, content='tasks', content_rowid='id', prefix='2 3')",
+    "CREATE TRIGGER tasks_fts_insert AFTER INSERT ON tasks BEGIN"
+    " INSERT INTO tasks_fts(rowid, name, description) VALUES (new.id, new.name, new.description);"
+    " END",
+    "CREATE TRIGGER tasks_fts_delete AFTER DELETE ON tasks BEGIN"
+    " INSERT INTO tasks_fts(tasks_fts, rowid, name, description)"
+    " VALUES ('delete', old.id, old.name, old.description);"
+    " END",
+    "CREATE TRIGGER tasks_fts_update AFTER UPDATE OF name, description ON tasks BEGIN"
+    " INSERT INTO tasks_fts(tasks_fts, rowid, name, description)"
+    " VALUES ('delete', old.id, old.name, old.description);"
+    " INSERT INTO tasks_fts(rowid, name, description) VALUES (new.id, new.name, new.description);"
+    " END",
+    "INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')",
+)
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS tasks_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_fts_insert",
+    "DROP TABLE IF EXISTS tasks_fts",
+)
+
+# Same expression as app.search.DOCUMENT_SQL, so queries can use the index
+POSTGRES_UPGRADE = (
+    "CREATE INDEX ix_tasks_search ON tasks USING gin ("
+    "to_tsvector('english', coalesce(name, '') || ' ' || coalesce(description, '')))",
+)
+POSTGRES_DOWNGRADE = (
+    "DROP INDEX IF EXISTS ix_tasks_search",
+)
+
+
+def upgrade() -> None:
+    for column in FILTER_INDEXES:
+        op.create_index(f"ix_tasks_{column}", "tasks", [column], unique=False)
+
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+
+    for column in reversed(FILTER_INDEXES):
+        op.drop_index(f"ix_tasks_{column}", table_name="tasks")
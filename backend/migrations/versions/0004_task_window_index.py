@@ -0,0 +1,69 @@
+"""task date-window index for the timeline
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Each task's span in days since 1970, lower end first
+START_DAY = "min(julianday({0}.start_time), julianday({0}.due_time)) - 2440587.5"
+DUE_DAY = "max(julianday({0}.start_time), julianday({0}.due_time)) - 2440587.5"
+
+# R*Tree over task spans, kept in step by triggers. A batch migration that
+# recreates tasks drops the triggers and must add them back
+SQLITE_UPGRADE = (
+    "CREATE VIRTUAL TABLE tasks_window USING rtree(id, start_day, due_day)",
+    "CREATE TRIGGER tasks_window_insert AFTER INSERT ON tasks BEGIN"
+    " INSERT INTO tasks_window(id, start_day, due_day)"
+    f" VALUES (new.id, {START_DAY.format('new')}, {DUE_DAY.format('new')});"
+    " END",
+    "CREATE TRIGGER tasks_window_delete AFTER DELETE ON tasks BEGIN"
+    " DELETE FROM tasks_window WHERE id = old.id;"
+    " END",
+    "CREATE TRIGGER tasks_window_update AFTER UPDATE OF start_time, due_time ON tasks BEGIN"
+    f" UPDATE tasks_window SET start_day = {START_DAY.format('new')}, due_day = {DUE_DAY.format('new')}"
+    " WHERE id = new.id;"
+    " END",
+    "INSERT INTO tasks_window(id, start_day, due_day)"
+    f" SELECT id, {START_DAY.format('tasks')}, {DUE_DAY.format('tasks')} FROM tasks",
+)
+SQLITE_DOWNGRADE = (
+    "DROP TRIGGER IF EXISTS tasks_window_update",
+    "DROP TRIGGER IF EXISTS tasks_window_delete",
+    "DROP TRIGGER IF EXISTS tasks_window_insert",
+    "DROP TABLE IF EXISTS tasks_window",
+)
+
+# Same expression as app.timeline.WINDOW_SQL, so queries can use the index
+POSTGRES_UPGRADE = (
+    "CREATE INDEX ix_tasks_window ON tasks USING gist ("
+    "tsrange(least(start_time, due_time), greatest(start_time, due_time), '[]'))",
+)
+POSTGRES_DOWNGRADE = (
+    "DROP INDEX IF EXISTS ix_tasks_window",
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": SQLITE_UPGRADE, "postgresql": POSTGRES_UPGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    statements = {"sqlite": SQLITE_DOWNGRADE, "postgresql": POSTGRES_DOWNGRADE}.get(dialect, ())
+    for statement in statements:
+        op.execute(statement)
@@ -0,0 +1,49 @@
+"""task closure table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "task_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["tasks.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(
+        "ix_task_closure_descendant_id_depth", "task_closure", ["descendant_id", "depth"], unique=False
+    )
+
+    # Backfill: walk up from every task; the depth cap guards against parent cycles
+    op.execute(
+        "WITH RECURSIVE paths(ancestor_id, descendant_id, depth) AS ("
+        " SELECT id, id, 0 FROM tasks"
+        " UNION ALL SELECT tasks.parent_task_id, paths.descendant_id, paths.depth + 1 FROM tasks"
+        " JOIN paths ON tasks.id = paths.ancestor_id"
+        " WHERE tasks.parent_task_id IS NOT NULL AND paths.depth < 1000"
+        ") INSERT INTO task_closure (ancestor_id, descendant_id, depth)"
+        " SELECT ancestor_id, descendant_id, depth FROM paths"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_task_closure_descendant_id_depth", table_name="task_closure")
+    op.drop_table("task_closure")
@@ -0,0 +1,33 @@
+"""insert sentinel columns
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("tasks", "manpower")
+
+
+def upgrade() -> None:
+    # Always NULL; lets bulk INSERT ... RETURNING batch rows on SQLite
+    for table in TABLES:
+        op.add_column(table, sa.Column("insert_sentinel", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    # Plain DROP COLUMN (SQLite 3.35+): a batch table copy would drop the
+    # search and window triggers on tasks
+    for table in TABLES:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN insert_sentinel")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Task hierarchy backfill script
+Recomputes the task closure table (app/hierarchy.py) and, with --rollups,
+the stored roll-ups from parent_task_id. Run it after editing tasks outside
+the API, e.g. with raw SQL
+
+Usage: python rebuild_hierarchy.py [--rollups]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Add the app directory to the Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, upgrade_schema
+from app.hierarchy import rebuild
+from app.rollups import rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the task closure table")
+    parser.add_argument("--rollups", action="store_true", help="recompute the task roll-ups as well")
+    args = parser.parse_args()
+
+    upgrade_schema()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        print(f"Closure table: {rebuild(db)} rows in {time.perf_counter() - started:.2f}s")
+        if args.rollups:
+            started = time.perf_counter()
+            print(f"Roll-ups: {rebuild_rollups(db)} tasks in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"Error rebuilding the hierarchy: {e}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+
+import pytest
+
+# Configure the app before anything imports it
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/test.db"
+
+from fastapi.testclient import TestClient
+
+from app.database import upgrade_schema
+
+upgrade_schema()
+
+from app.main import app
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
+def headers(client):
+    client.post("/api/users/", json={
+        "username": "admin", "email": "admin@example.com", "password": "admin123", "is_admin": True,
+    })
+    response = client.post("/api/token", data={"username": "admin", "password": "admin123"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture
+def make_task(client, headers):
+    def make_task(name, parent_id=None, **values):
+        body = {
+            "name": name,
+            "start_time": "2025-01-01T00:00:00",
+            "due_time": "2025-02-01T00:00:00",
+            "parent_task_id": parent_id,
+            **values,
+        }
+        response = client.post("/api/tasks/", json=body, headers=headers)
+        assert response.status_code == 200, response.text
+        return response.json()["id"]
+    return make_task
+
+ROLLUPS = {
+    "total_job": "rollup_total_job",
+    "completed": "rollup_completed",
+    "stuck": "rollup_stuck",
+    "est_cost": "rollup_est_cost",
+}
+
+@pytest.fixture
+def task_tree(client, headers):
+    """Fetch a task with its subtree, checking every roll-up on the way."""
+    def check(node):
+        for subtask in node["subtasks"]:
+            check(subtask)
+        for own, rollup in ROLLUPS.items():
+            expected = (node[own] or 0) + sum(subtask[rollup] for subtask in node["subtasks"])
+            assert node[rollup] == expected, (node["name"], rollup)
+
+    def task_tree(task_id):
+        response = client.get(f"/api/tasks/{task_id}", headers=headers)
+        assert response.status_code == 200, response.text
+        check(response.json())
+        return response.json()
+    return task_tree
@@ -0,0 +1,26 @@
+import pytest
+
+from app import querylog
+
+def _tasks(count):
+    return [
+        {"name": f"Batch task {number}", "start_time": "2025-01-01T00:00:00", "due_time": "2025-02-01T00:00:00"}
+        for number in range(count)
+    ]
+
+@pytest.fixture(scope="module", autouse=True)
+def warm_up(client, headers):
+    # First write to a collection also inserts its collection_versions row
+    client.post("/api/tasks/batch", json={"create": _tasks(1)}, headers=headers)
+
+@pytest.mark.parametrize("count", [5, 500])
+def test_batch_create_statement_count(client, headers, count):
+    # INSERT ... RETURNING, closure rows, roll-ups (3), version bump
+    with querylog.assert_query_count(6) as captured:
+        response = client.post("/api/tasks/batch", json={"create": _tasks(count)}, headers=headers)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [result["index"] for result in results] == list(range(count))
+    assert len({result["id"] for result in results}) == count
+    inserts = [shape for shape in captured.shapes if shape.startswith("INSERT INTO tasks ")]
+    assert [captured.shapes[shape] for shape in inserts] == [1]
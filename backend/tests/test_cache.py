@@ -0,0 +1,39 @@
+from app.cache import TTLCache
+
+def test_size_budget_evicts_least_recently_used():
+    cache = TTLCache(maxsize=10, ttl=60, getsizeof=len)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.get("a")
+    cache.set("c", b"1234")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1234"
+    assert cache.currsize == 8
+
+def test_oversized_value_is_not_cached():
+    cache = TTLCache(maxsize=10, ttl=60, getsizeof=len)
+    cache.set("a", b"1234")
+    cache.set("big", b"x" * 11)
+    assert cache.get("big") is None
+    assert cache.get("a") == b"1234"
+
+def test_discard_keys():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set('"tasks-1-abc"', 1)
+    cache.set('"manpower-1-abc"', 2)
+    cache.discard_keys(lambda key: key.startswith('"tasks-'))
+    assert len(cache) == 1
+    assert cache.currsize == 1
+
+def test_endpoints_sharing_a_collection_get_their_own_etags(client, headers, make_task):
+    make_task("Shared collection")
+    # Same collection, same version, same query string: only the path differs
+    tree = client.get("/api/tasks/?limit=7", headers=headers)
+    search = client.get("/api/tasks/search?limit=7", headers=headers)
+    assert tree.headers["ETag"] != search.headers["ETag"]
+
+    revalidated = client.get(
+        "/api/tasks/search?limit=7", headers={**headers, "If-None-Match": tree.headers["ETag"]}
+    )
+    assert revalidated.status_code == 200
+    assert revalidated.json() == search.json()
@@ -0,0 +1,46 @@
+import asyncio
+from datetime import datetime
+
+from app import events, models
+from app.database import SessionLocal
+
+class _Request:
+    async def is_disconnected(self):
+        return True
+
+def _write_manpower():
+    db = SessionLocal()
+    try:
+        db.add(models.Manpower(date=datetime(2024, 4, 1), manpower_type="Labour", engaged_to="Events"))
+        db.commit()
+    finally:
+        db.close()
+
+def test_events_require_a_token(client, headers):
+    assert client.get("/api/events").status_code == 401
+    assert client.get("/api/events", params={"token": "not-a-token"}).status_code == 401
+
+def test_commits_reach_subscribers():
+    async def scenario():
+        stream = events.stream(_Request())
+        assert await stream.__anext__() == "retry: 5000\n\n"
+        assert len(events.broker) == 1
+        # A commit on another thread is handed to the subscriber's loop
+        await asyncio.get_running_loop().run_in_executor(None, _write_manpower)
+        message = await asyncio.wait_for(stream.__anext__(), timeout=5)
+        assert message.startswith("event: change\n")
+        assert '"collection": "manpower"' in message
+        await stream.aclose()
+        assert len(events.broker) == 0
+    asyncio.run(scenario())
+
+def test_slow_subscriber_gets_resync():
+    async def scenario():
+        stream = events.stream(_Request())
+        await stream.__anext__()
+        for _ in range(events.broker.queue_size + 1):
+            events.broker.publish({"type": "change", "collection": "tasks"})
+        # The backlog is dropped for a single resync, not grown without limit
+        assert (await stream.__anext__()).startswith("event: resync\n")
+        await stream.aclose()
+    asyncio.run(scenario())
@@ -0,0 +1,30 @@
+import csv
+import io
+import json
+
+def test_tasks_as_ndjson(client, headers, make_task):
+    task_id = make_task("Exported task", description="line one\nline two")
+    response = client.get("/api/tasks/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="tasks.ndjson"'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    row = next(row for row in rows if row["id"] == task_id)
+    assert row["description"] == "line one\nline two"
+    assert row["start_time"] == "2025-01-01T00:00:00"
+    assert "insert_sentinel" not in row
+
+def test_manpower_as_csv(client, headers):
+    client.post("/api/manpower/", json={
+        "date": "2024-02-01T00:00:00", "manpower_type": "Engineer", "engaged_to": "Export, CSV",
+    }, headers=headers)
+    response = client.get("/api/manpower/export", params={"format": "csv"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert "insert_sentinel" not in rows[0]
+    assert any(row["engaged_to"] == "Export, CSV" for row in rows)
+
+def test_export_requires_login(client):
+    assert client.get("/api/tasks/export").status_code == 401
@@ -0,0 +1,49 @@
+from app import pagination
+
+def _family(make_task):
+    root = make_task("Projected root", total_job=4)
+    child = make_task("Projected child", root, total_job=2)
+    grandchild = make_task("Projected grandchild", child)
+    return root, child, grandchild
+
+def _page_from(client, headers, root, **params):
+    # Start the page at ``root``, whatever else the session has created
+    cursor = pagination.encode_cursor(root - 1)
+    response = client.get("/api/tasks/", params={"cursor": cursor, "limit": 1, **params}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_fields_projects_every_level(client, headers, make_task):
+    root, child, grandchild = _family(make_task)
+    node = client.get(f"/api/tasks/{root}", params={"fields": "name"}, headers=headers).json()
+    assert node == {
+        "id": root, "name": "Projected root", "subtasks": [{
+            "id": child, "name": "Projected child", "subtasks": [{
+                "id": grandchild, "name": "Projected grandchild", "subtasks": [],
+            }],
+        }],
+    }
+    [listed] = _page_from(client, headers, root, fields="name,total_job")
+    assert set(listed) == {"id", "name", "total_job", "subtasks"}
+    assert listed["subtasks"][0]["total_job"] == 2
+
+def test_unknown_field_rejected(client, headers, make_task):
+    root = make_task("Projected unknown")
+    response = client.get(f"/api/tasks/{root}", params={"fields": "name,password"}, headers=headers)
+    assert response.status_code == 400
+    assert "password" in response.json()["detail"]
+
+def test_flat_shape(client, headers, make_task):
+    root, child, grandchild = _family(make_task)
+    rows = client.get(
+        f"/api/tasks/{root}", params={"shape": "flat", "fields": "name"}, headers=headers
+    ).json()
+    assert rows == [
+        {"id": root, "name": "Projected root", "parent_task_id": None},
+        {"id": child, "name": "Projected child", "parent_task_id": root},
+        {"id": grandchild, "name": "Projected grandchild", "parent_task_id": child},
+    ]
+    listed = _page_from(client, headers, root, shape="flat")
+    assert [row["id"] for row in listed] == [root, child, grandchild]
+    assert all("subtasks" not in row for row in listed)
+    assert listed[1]["parent_task_id"] == root
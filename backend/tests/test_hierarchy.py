@@ -0,0 +1,64 @@
+import pytest
+
+from app import hierarchy, rollups
+from app.database import SessionLocal
+
+@pytest.mark.parametrize("rebuild", [hierarchy.rebuild, rollups.rebuild_rollups])
+def test_rebuilds_invalidate_cached_trees(client, headers, make_task, rebuild):
+    make_task("Rebuilt tree")
+    before = client.get("/api/tasks/", headers=headers)
+    db = SessionLocal()
+    try:
+        rebuild(db)
+    finally:
+        db.close()
+    # The repair bumped the tasks version: the old ETag no longer matches
+    after = client.get("/api/tasks/", headers={**headers, "If-None-Match": before.headers["ETag"]})
+    assert after.status_code == 200
+    assert after.headers["ETag"] != before.headers["ETag"]
+
+def test_create_under_missing_parent(client, headers):
+    body = {
+        "name": "Orphan",
+        "start_time": "2025-01-01T00:00:00",
+        "due_time": "2025-02-01T00:00:00",
+        "parent_task_id": 10 ** 9,
+    }
+    response = client.post("/api/tasks/", json=body, headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Parent task not found"
+
+def test_reparenting_updates_both_chains(client, headers, make_task, task_tree):
+    site = make_task("Hierarchy site", total_job=1)
+    tower = make_task("Hierarchy tower", site, total_job=2)
+    annex = make_task("Hierarchy annex", site, total_job=5)
+    floor = make_task("Hierarchy floor", tower, total_job=3)
+    make_task("Hierarchy room", floor, total_job=4)
+
+    response = client.put(f"/api/tasks/{floor}", json={"parent_task_id": annex}, headers=headers)
+    assert response.status_code == 200
+    tree = task_tree(site)
+    assert {task["id"]: task["rollup_total_job"] for task in tree["subtasks"]} == {tower: 2, annex: 12}
+    assert tree["rollup_total_job"] == 15
+
+    # Under itself or one of its own subtasks: refused, nothing changes
+    for parent_id in (annex, floor):
+        response = client.put(f"/api/tasks/{annex}", json={"parent_task_id": parent_id}, headers=headers)
+        assert response.status_code == 400
+    response = client.put(f"/api/tasks/{floor}", json={"parent_task_id": 10 ** 9}, headers=headers)
+    assert response.json()["detail"] == "Parent task not found"
+    assert task_tree(site)["rollup_total_job"] == 15
+
+def test_batch_moves(client, headers, make_task, task_tree):
+    site = make_task("Batch move site", total_job=1)
+    block = make_task("Batch move block", site, total_job=2)
+    other = make_task("Batch move other", site, total_job=3)
+    wing = make_task("Batch move wing", block, total_job=4)
+
+    response = client.post("/api/tasks/batch", json={
+        "update": [{"id": wing, "parent_task_id": other}, {"id": other, "parent_task_id": wing}],
+    }, headers=headers)
+    results = response.json()["results"]
+    assert [result["ok"] for result in results] == [True, False]
+    tree = task_tree(site)
+    assert {task["id"]: task["rollup_total_job"] for task in tree["subtasks"]} == {block: 2, other: 7}
@@ -0,0 +1,56 @@
+import io
+import os
+
+from openpyxl import Workbook
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "..", "..", "Sample Task List.xlsx")
+
+def _xlsx(sheets, active=0):
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    for title, rows in sheets:
+        worksheet = workbook.create_sheet(title)
+        for row in rows:
+            worksheet.append(row)
+    workbook.active = active
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+def _upload(client, headers, content, filename="tasks.xlsx", **params):
+    return client.post(
+        "/api/tasks/import", params=params, files={"file": (filename, content)}, headers=headers
+    )
+
+TASKS = [
+    ("name", "start_time", "due_time", "parent_row"),
+    ("Import root", "2025-01-01", "2025-03-01", None),
+    ("Import child", "2025-01-05", "2025-02-01", 2),
+]
+
+def test_sample_without_task_columns_is_rejected(client, headers):
+    with open(SAMPLE, "rb") as file:
+        response = _upload(client, headers, file.read())
+    assert response.status_code == 400
+    assert "No recognized column headers" in response.json()["detail"]
+
+def test_first_non_empty_sheet_is_read(client, headers):
+    # The active sheet is blank; the tasks are on the first one
+    content = _xlsx([("Tasks", TASKS), ("Notes", [])], active=1)
+    response = _upload(client, headers, content)
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 2
+
+def test_named_sheet(client, headers):
+    content = _xlsx([("Notes", [("just", "notes")]), ("Plan", TASKS)])
+    assert _upload(client, headers, content).status_code == 400
+    response = _upload(client, headers, content, sheet="Plan")
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 2
+    assert _upload(client, headers, content, sheet="Missing").status_code == 400
+
+def test_missing_required_column(client, headers):
+    content = b"name,start_time\nNo due date,2025-01-01\n"
+    response = _upload(client, headers, content, filename="tasks.csv")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Missing required column(s): due_time"
@@ -0,0 +1,36 @@
+from prometheus_client import REGISTRY
+
+from app import metrics
+
+def requests_total(method, route, status):
+    labels = {"method": method, "route": route, "status": status}
+    return REGISTRY.get_sample_value("http_requests_total", labels) or 0
+
+def test_requests_labelled_by_route_template(client, headers):
+    before = requests_total("GET", "/api/tasks/{task_id}", "404")
+    assert client.get("/api/tasks/987654", headers=headers).status_code == 404
+    assert requests_total("GET", "/api/tasks/{task_id}", "404") == before + 1
+    body = client.get("/metrics").text
+    assert 'route="/api/tasks/987654"' not in body
+    labels = {"method": "GET", "route": "/api/tasks/{task_id}"}
+    assert REGISTRY.get_sample_value("http_request_duration_seconds_count", labels) >= 1
+    # The request has finished, so its in-flight series is back to zero
+    assert REGISTRY.get_sample_value("http_requests_in_progress", labels) == 0
+
+def test_unmatched_paths_share_one_label(client):
+    before = requests_total("GET", metrics.UNMATCHED, "404")
+    assert client.get("/no/such/path/1").status_code == 404
+    assert client.get("/no/such/path/2").status_code == 404
+    assert requests_total("GET", metrics.UNMATCHED, "404") == before + 2
+
+def test_wrong_method_keeps_the_template(client):
+    before = requests_total("PATCH", "/metrics", "405")
+    assert client.patch("/metrics").status_code == 405
+    assert requests_total("PATCH", "/metrics", "405") == before + 1
+
+def test_pool_metrics_exposed(client, headers):
+    client.get("/api/tasks/", headers=headers)
+    body = client.get("/metrics").text
+    assert 'db_connection_hold_seconds_count{engine="sync"}' in body
+    assert 'db_pool_checkouts_total{engine="sync"}' in body
+    assert "password_hash_queue_depth" in body
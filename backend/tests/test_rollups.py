@@ -0,0 +1,35 @@
+def _values(number):
+    return {"total_job": 10 * number, "completed": number, "stuck": 1, "est_cost": 100 * number}
+
+def test_rollups_follow_creates_updates_and_deletes(client, headers, make_task, task_tree):
+    site = make_task("Roll-up site", **_values(1))
+    tower = make_task("Roll-up tower", site, **_values(2))
+    floor = make_task("Roll-up floor", tower, **_values(3))
+    assert task_tree(site)["rollup_total_job"] == 60
+    assert task_tree(site)["rollup_est_cost"] == 600
+
+    response = client.put(f"/api/tasks/{floor}", json={"completed": 30, "stuck": 0}, headers=headers)
+    assert response.status_code == 200
+    tree = task_tree(site)
+    assert (tree["rollup_completed"], tree["rollup_stuck"]) == (33, 2)
+
+    client.delete(f"/api/tasks/{floor}", headers=headers)
+    tree = task_tree(site)
+    assert tree["rollup_total_job"] == 30
+    assert tree["subtasks"][0]["rollup_total_job"] == 20
+
+def test_rollups_follow_batch_updates(client, headers, make_task, task_tree):
+    site = make_task("Batch roll-up site", **_values(1))
+    block = make_task("Batch roll-up block", site, **_values(2))
+    response = client.post("/api/tasks/batch", json={
+        "create": [{
+            "name": "Batch roll-up wing",
+            "start_time": "2025-01-01T00:00:00",
+            "due_time": "2025-02-01T00:00:00",
+            "parent_task_id": block,
+            **_values(3),
+        }],
+        "update": [{"id": block, "total_job": 0}],
+    }, headers=headers)
+    assert all(result["ok"] for result in response.json()["results"])
+    assert task_tree(site)["rollup_total_job"] == 40
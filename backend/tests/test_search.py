@@ -0,0 +1,62 @@
+def _search(client, headers, **params):
+    response = client.get("/api/tasks/search", params=params, headers=headers)
+    assert response.status_code == 200, response.text
+    return response
+
+def _names(response):
+    return [task["name"] for task in response.json()]
+
+def test_search_does_not_collide_with_tree(client, headers, make_task):
+    make_task("Collision root")
+    tree = client.get("/api/tasks/?limit=50", headers=headers)
+    search = _search(client, headers, limit=50)
+    assert tree.headers["ETag"] != search.headers["ETag"]
+    # Flat records, not the cached tree
+    assert all("subtasks" not in task for task in search.json())
+    assert search.json() != tree.json()
+
+    revalidated = client.get(
+        "/api/tasks/search?limit=50", headers={**headers, "If-None-Match": tree.headers["ETag"]}
+    )
+    assert revalidated.status_code == 200
+
+def test_filters(client, headers, make_task):
+    site = make_task("Quokka site", owner="Quokka crew", status="In Progress")
+    make_task("Quokka wall", site, owner="Quokka crew", status="Stuck")
+    make_task("Quokka roof", site, owner="Quokka crew", status="Completed", due_time="2025-06-01T00:00:00")
+    make_task("Quokka door", site, owner="Someone else", status="Stuck")
+
+    assert _names(_search(client, headers, owner="Quokka crew", status="Stuck")) == ["Quokka wall"]
+    assert _names(_search(client, headers, q="quokka", status=["Stuck", "Completed"], owner="Quokka crew")) \
+        in (["Quokka wall", "Quokka roof"], ["Quokka roof", "Quokka wall"])
+    assert _names(_search(client, headers, q="quokka", due_from="2025-03-01T00:00:00")) == ["Quokka roof"]
+    # Matches at any depth, the last word as a prefix
+    assert sorted(_names(_search(client, headers, q="quokka wa"))) == ["Quokka wall"]
+
+def test_ranked_results_page_by_score_cursor(client, headers, make_task):
+    for number in range(5):
+        make_task(f"Wombat {number}", description="wombat " * number)
+    seen, cursor = [], None
+    while True:
+        params = {"q": "wombat", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = _search(client, headers, **params)
+        seen += _names(response)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == [f"Wombat {number}" for number in range(5)]
+    assert len(seen) == len(set(seen))
+
+def test_index_follows_renames(client, headers, make_task):
+    task_id = make_task("Platypus shed")
+    assert _names(_search(client, headers, q="platypus")) == ["Platypus shed"]
+
+    response = client.put(f"/api/tasks/{task_id}", json={"name": "Echidna shed"}, headers=headers)
+    assert response.status_code == 200
+    assert _names(_search(client, headers, q="platypus")) == []
+    assert _names(_search(client, headers, q="echidna")) == ["Echidna shed"]
+
+    client.delete(f"/api/tasks/{task_id}", headers=headers)
+    assert _names(_search(client, headers, q="echidna")) == []
@@ -0,0 +1,49 @@
+def _branch(make_task, name):
+    site = make_task(f"{name} site", total_job=1)
+    tower = make_task(f"{name} tower", site, total_job=2)
+    floor = make_task(f"{name} floor", tower, total_job=3)
+    room = make_task(f"{name} room", floor, total_job=4)
+    return site, tower, floor, room
+
+def test_delete_takes_the_whole_branch(client, headers, make_task, task_tree):
+    site, tower, floor, room = _branch(make_task, "Delete")
+
+    response = client.delete(f"/api/tasks/{tower}", params={"dry_run": True}, headers=headers)
+    assert response.json() == {
+        "message": "Dry run: nothing was deleted", "task_id": tower, "tasks": 3, "dry_run": True,
+    }
+    assert task_tree(site)["rollup_total_job"] == 10
+
+    response = client.delete(f"/api/tasks/{tower}", headers=headers)
+    assert response.json()["tasks"] == 3
+    for task_id in (tower, floor, room):
+        assert client.get(f"/api/tasks/{task_id}", headers=headers).status_code == 404
+    tree = task_tree(site)
+    assert (tree["subtasks"], tree["rollup_total_job"]) == ([], 1)
+
+def test_move_takes_the_whole_branch(client, headers, make_task, task_tree):
+    site, tower, floor, room = _branch(make_task, "Move")
+    other = make_task("Move other site")
+
+    response = client.post(f"/api/tasks/{floor}/move", params={"dry_run": True},
+                           json={"parent_task_id": other}, headers=headers)
+    assert (response.json()["tasks"], response.json()["dry_run"]) == (2, True)
+    assert task_tree(other)["subtasks"] == []
+
+    response = client.post(f"/api/tasks/{floor}/move", json={"parent_task_id": other}, headers=headers)
+    assert response.json()["tasks"] == 2
+    assert task_tree(other)["rollup_total_job"] == 7
+    assert task_tree(site)["rollup_total_job"] == 3
+
+    # To the top level
+    response = client.post(f"/api/tasks/{room}/move", json={"parent_task_id": None}, headers=headers)
+    assert response.json()["tasks"] == 1
+    assert task_tree(room)["parent_task_id"] is None
+    assert task_tree(other)["rollup_total_job"] == 3
+
+def test_batch_delete_takes_the_whole_branch(client, headers, make_task, task_tree):
+    site, tower, floor, room = _branch(make_task, "Batch delete")
+    response = client.post("/api/tasks/batch", json={"delete": [floor, room]}, headers=headers)
+    assert all(result["ok"] for result in response.json()["results"])
+    assert client.get(f"/api/tasks/{room}", headers=headers).status_code == 404
+    assert task_tree(site)["rollup_total_job"] == 3
@@ -0,0 +1,40 @@
+from app import sync
+
+def _sync(client, headers, since=None):
+    response = client.get("/api/sync", params={"since": since} if since else {}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_changes_and_tombstones_since_token(client, headers, make_task, monkeypatch):
+    # No overlap, so rows written before the token stay out of the delta
+    monkeypatch.setattr(sync, "SYNC_OVERLAP_SECONDS", 0)
+    untouched = make_task("Sync untouched")
+    kept = make_task("Sync kept")
+    branch = make_task("Sync branch")
+    leaf = make_task("Sync leaf", branch)
+    manpower = client.post("/api/manpower/", json={
+        "date": "2024-03-01T00:00:00", "manpower_type": "Labour", "engaged_to": "Sync",
+    }, headers=headers).json()["id"]
+
+    snapshot = _sync(client, headers)
+    assert {kept, branch, leaf} <= {task["id"] for task in snapshot["tasks"]}
+    assert manpower in {record["id"] for record in snapshot["manpower"]}
+
+    added = make_task("Sync added")
+    client.put(f"/api/tasks/{kept}", json={"status": "Completed"}, headers=headers)
+    client.delete(f"/api/tasks/{branch}", headers=headers)
+    client.delete(f"/api/manpower/{manpower}", headers=headers)
+
+    delta = _sync(client, headers, snapshot["token"])
+    tasks = {task["id"]: task for task in delta["tasks"]}
+    assert added in tasks
+    assert untouched not in tasks
+    assert tasks[kept]["status"] == "Completed"
+    # The whole deleted branch leaves tombstones
+    assert {branch, leaf} <= set(delta["deleted_tasks"])
+    assert not {branch, leaf} & set(tasks)
+    assert manpower in delta["deleted_manpower"]
+
+def test_bad_token(client, headers):
+    response = client.get("/api/sync", params={"since": "garbage"}, headers=headers)
+    assert response.status_code == 400
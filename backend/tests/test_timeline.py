@@ -0,0 +1,54 @@
+def _timeline(client, headers, start, end):
+    response = client.get(
+        "/api/tasks/timeline", params={"start": start, "end": end}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+def test_window_and_ancestors(client, headers, make_task):
+    # Far from the dates other tests use, so only these tasks are in the window
+    project = make_task("Timeline project", start_time="2030-01-01T00:00:00", due_time="2030-12-31T00:00:00")
+    phase = make_task("Timeline phase", project, start_time="2030-03-01T00:00:00", due_time="2030-04-30T00:00:00")
+    early = make_task("Early work", phase, start_time="2030-03-01T00:00:00", due_time="2030-03-10T00:00:00")
+    late = make_task("Late work", phase, start_time="2030-04-20T00:00:00", due_time="2030-04-30T00:00:00")
+    # Due before its start: treated as spanning both dates
+    make_task("Backwards work", project, start_time="2030-09-10T00:00:00", due_time="2030-09-01T00:00:00")
+
+    body = _timeline(client, headers, "2030-04-25T00:00:00", "2030-05-05T00:00:00").json()
+    assert [task["id"] for task in body["tasks"]] == [project, phase, late]
+    assert body["ancestors"] == []
+
+    body = _timeline(client, headers, "2030-03-05T00:00:00", "2030-03-06T00:00:00").json()
+    assert {task["id"] for task in body["tasks"]} == {project, phase, early}
+
+    # A window inside the subtask only: its parents come back as ancestors
+    client.put(f"/api/tasks/{project}", json={"start_time": "2030-06-01T00:00:00"}, headers=headers)
+    client.put(f"/api/tasks/{phase}", json={"start_time": "2030-03-08T00:00:00"}, headers=headers)
+    body = _timeline(client, headers, "2030-03-02T00:00:00", "2030-03-03T00:00:00").json()
+    assert [task["id"] for task in body["tasks"]] == [early]
+    assert [task["id"] for task in body["ancestors"]] == [project, phase]
+
+    body = _timeline(client, headers, "2030-09-05T00:00:00", "2030-09-05T00:00:00").json()
+    assert [task["name"] for task in body["tasks"]] == ["Timeline project", "Backwards work"]
+
+def test_end_before_start(client, headers):
+    response = client.get(
+        "/api/tasks/timeline",
+        params={"start": "2030-02-01T00:00:00", "end": "2030-01-01T00:00:00"},
+        headers=headers,
+    )
+    assert response.status_code == 400
+
+def test_timeline_does_not_collide_with_tree(client, headers, make_task):
+    make_task("Timeline collision", start_time="2031-01-01T00:00:00", due_time="2031-01-31T00:00:00")
+    query = "start=2031-01-01T00:00:00&end=2031-01-31T00:00:00"
+    tree = client.get(f"/api/tasks/?{query}", headers=headers)
+    timeline = client.get(f"/api/tasks/timeline?{query}", headers=headers)
+    assert tree.headers["ETag"] != timeline.headers["ETag"]
+    assert set(timeline.json()) == {"tasks", "ancestors"}
+
+    revalidated = client.get(
+        f"/api/tasks/timeline?{query}", headers={**headers, "If-None-Match": tree.headers["ETag"]}
+    )
+    assert revalidated.status_code == 200
+    assert revalidated.json() == timeline.json()
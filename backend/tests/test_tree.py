@@ -0,0 +1,44 @@
+import pytest
+
+from app import querylog, versions
+
+@pytest.fixture(autouse=True)
+def fresh_versions(monkeypatch):
+    # Read the collection version on every request, so counts don't depend on timing
+    monkeypatch.setattr(versions, "VERSION_CACHE_SECONDS", 0)
+
+def _tree(make_task, depth, fanout):
+    root = make_task(f"Tree {depth}x{fanout}")
+    level = [root]
+    for number in range(depth):
+        level = [make_task(f"Level {number + 1}", parent_id) for parent_id in level for _ in range(fanout)]
+    return root
+
+@pytest.mark.parametrize("depth,fanout", [(1, 1), (4, 3)])
+def test_task_tree_query_count(client, headers, make_task, depth, fanout):
+    root = _tree(make_task, depth, fanout)
+    # The task, then its whole subtree through the closure table
+    with querylog.assert_query_count(2):
+        response = client.get(f"/api/tasks/{root}", headers=headers)
+    assert response.status_code == 200
+    node, levels = response.json(), 0
+    while node["subtasks"]:
+        node, levels = node["subtasks"][0], levels + 1
+    assert levels == depth
+
+@pytest.mark.parametrize("depth,fanout", [(1, 1), (3, 4)])
+def test_task_list_query_count(client, headers, make_task, depth, fanout):
+    _tree(make_task, depth, fanout)
+    # Collection version, top-level page, every subtree of the page
+    with querylog.assert_query_count(3):
+        response = client.get("/api/tasks/", headers=headers)
+    assert response.status_code == 200
+
+    # Unchanged: served from the response cache, or 304 for a matching ETag
+    with querylog.assert_query_count(1):
+        assert client.get("/api/tasks/", headers=headers).status_code == 200
+    with querylog.assert_query_count(1):
+        revalidated = client.get(
+            "/api/tasks/", headers={**headers, "If-None-Match": response.headers["ETag"]}
+        )
+    assert revalidated.status_code == 304